@@ -20,7 +20,8 @@ from typing import List, Dict, Any
 from mei_rules import (
     check_equipment_predecessor_rules,
     check_module_predecessor_rules,
-    check_standard_predecessor_rules
+    check_standard_predecessor_rules,
+    reasons_to_strings
 )
 from db_utils import (
     load_dependency_rules,
@@ -137,7 +138,11 @@ def analyze_why_no_predecessor(activity_id: str, activities_df: pd.DataFrame,
         
         # Extract results from rule checking
         pred_analysis["dependency_key"] = rule_result.get("dependency_key")
-        pred_analysis["failure_reasons"] = rule_result.get("failure_reasons", [])
+        pred_analysis["failure_reasons"] = reasons_to_strings(
+            rule_result.get("failure_reasons_flags", 0),
+            rule_result.get("dependency_key"),
+            current_activity_type.lower()
+        )
         
         analysis_results.append(pred_analysis)
     
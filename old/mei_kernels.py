@@ -0,0 +1,99 @@
+"""
+MEI Kernels Module
+
+This module contains compiled pairwise kernels used by the main logic module
+for large CWA/SubArea groups. The kernels apply the same equipment/module
+predecessor rules as the per-row loop, one (activity, predecessor) pair at a
+time, without the N×N float temporaries of the NumPy version.
+
+numba is optional: without it HAVE_NUMBA is False and callers keep their
+NumPy implementation.
+
+"""
+
+import numpy as np
+
+from mei_rules import njit, prange, _HAVE_NUMBA, HORIZONTAL_OVERLAP_THRESHOLD
+
+HAVE_NUMBA = _HAVE_NUMBA
+
+# Type of the current activity
+CURRENT_STANDARD = 0
+CURRENT_EQUIPMENT = 1
+CURRENT_MODULE = 2
+
+# Vertical rule a predecessor falls under for one current activity type
+RULE_NONE = 0       # Not a qualifying predecessor
+RULE_STANDARD = 1   # has_vertical_dependency(pred_max_z, current_min_z, 0, 0.2)
+RULE_STEEL = 2      # pred_min_z <= current_min_z < pred_max_z
+RULE_CONCRETE = 3   # has_vertical_dependency(pred_max_z, current_min_z, 0.5, 0.2)
+
+
+# fastmath is left off: it could change the rounding of the overlap ratio,
+# and missing coordinates are NaN and must keep their comparison results
+@njit(parallel=True, cache=True)
+def special_predecessor_pairs(current_kind: np.ndarray, equipment_rule: np.ndarray, module_rule: np.ndarray,
+                              name_codes: np.ndarray, min_z: np.ndarray, max_z: np.ndarray,
+                              x_min: np.ndarray, x_max: np.ndarray, y_min: np.ndarray, y_max: np.ndarray):
+    """
+    Find all valid equipment/module (activity, predecessor) pairs of a group.
+
+    Args:
+        current_kind: CURRENT_* code of each row
+        equipment_rule: RULE_* code of each row as a predecessor of an equipment activity
+        module_rule: RULE_* code of each row as a predecessor of a module activity
+        name_codes: Factorized names; rows with equal codes are never paired
+        min_z, max_z: Vertical extent of each row
+        x_min, x_max, y_min, y_max: Bounding box of each row
+
+    Returns:
+        Tuple of (activity rows, predecessor rows), ordered by activity row
+        and then predecessor row
+    """
+    n = current_kind.shape[0]
+    valid = np.zeros((n, n), dtype=np.bool_)
+    
+    # Every vertical rule needs current_min_z < max_z + 0.2, so each row only
+    # visits the predecessors at the top of this order; NaN is never reached
+    reach = np.empty(n)
+    for j in range(n):
+        reach[j] = max_z[j] + 0.2 if max_z[j] == max_z[j] else -np.inf
+    order = np.argsort(reach)
+    sorted_reach = reach[order]
+    
+    for i in prange(n):
+        kind = current_kind[i]
+        if kind == CURRENT_STANDARD:
+            continue
+        rules = equipment_rule if kind == CURRENT_EQUIPMENT else module_rule
+        current_min_z = min_z[i]
+        current_area = (x_max[i] - x_min[i]) * (y_max[i] - y_min[i])
+        # A NaN in the current box fails every overlap check; a NaN Z fails every vertical rule
+        if not current_area > 0 or current_min_z != current_min_z:
+            continue
+        for k in range(np.searchsorted(sorted_reach, current_min_z, 'right'), n):
+            j = order[k]
+            rule = rules[j]
+            if rule == RULE_NONE or name_codes[j] == name_codes[i]:
+                continue
+
+            if rule == RULE_STEEL:
+                vertical = min_z[j] <= current_min_z and current_min_z < max_z[j]
+            else:
+                threshold1 = 0.5 if rule == RULE_CONCRETE else 0.0
+                vertical = current_min_z > max_z[j] - threshold1 and current_min_z < max_z[j] + 0.2
+            if not vertical:
+                continue
+
+            # A NaN side of the predecessor box is skipped, as min()/max() do in has_80_percent_area_overlap
+            overlap_x = (x_max[j] if x_max[j] < x_max[i] else x_max[i]) - (x_min[j] if x_min[j] > x_min[i] else x_min[i])
+            if not overlap_x > 0:
+                continue
+            overlap_y = (y_max[j] if y_max[j] < y_max[i] else y_max[i]) - (y_min[j] if y_min[j] > y_min[i] else y_min[i])
+            if not overlap_y > 0:
+                continue
+            overlap_area = overlap_x * overlap_y
+            pred_area = (x_max[j] - x_min[j]) * (y_max[j] - y_min[j])
+            valid[i, j] = (overlap_area / current_area >= HORIZONTAL_OVERLAP_THRESHOLD or
+                           (pred_area > 0 and overlap_area / pred_area >= HORIZONTAL_OVERLAP_THRESHOLD))
+    return np.nonzero(valid)
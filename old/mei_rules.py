@@ -8,7 +8,29 @@ by both the main logic module and the reporting module .
 """
 
 import re
-from typing import Tuple, Optional, List, Dict, Any
+from dataclasses import dataclass
+from enum import IntFlag
+from functools import lru_cache
+from typing import Tuple, Optional, List, Dict, Any, FrozenSet, Pattern
+
+try:
+    import ahocorasick
+except ImportError:
+    # pyahocorasick is optional; keyword lookup falls back to a linear scan
+    ahocorasick = None
+
+try:
+    from numba import njit, prange
+    _HAVE_NUMBA = True
+except ImportError:
+    # numba is optional; without it the kernels in mei_kernels run as plain Python
+    _HAVE_NUMBA = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
 
 
 # -----------------------------
@@ -37,10 +59,78 @@ VERTICAL_THRESHOLDS = {
 HORIZONTAL_OVERLAP_THRESHOLD = 0.8
 
 
+class FailureReason(IntFlag):
+    """
+    Reasons a predecessor failed the rule checks, combined as bit flags.
+    
+    Use reasons_to_strings to turn them into report messages.
+    """
+    VERTICAL = 1
+    HORIZONTAL = 2
+    NO_DEP_KEY = 4
+    NOT_QUALIFYING = 8
+    DEP_RULE = 16
+    STRUCT_STEEL = 32
+    CONCRETE_PILE = 64
+
+
+def reasons_to_strings(flags: int, dependency_key: Optional[str] = None, kind: str = "equipment") -> List[str]:
+    """
+    Convert failure flags from the rule checks into report messages.
+    
+    Args:
+        flags: FailureReason flags from a rule check result
+        dependency_key: Dependency key from the same result
+        kind: Type of current activity ("equipment", "module" or "standard")
+        
+    Returns:
+        List of failure reason messages
+    """
+    reasons = []
+    if flags & FailureReason.NO_DEP_KEY:
+        reasons.append("No dependency key found for current activity")
+    if flags & FailureReason.DEP_RULE:
+        reasons.append("Dependency rule matching failed")
+    if flags & FailureReason.NOT_QUALIFYING:
+        reasons.append(f"Not a qualifying predecessor type for {'modules' if kind == 'module' else 'equipment'}")
+    if flags & FailureReason.VERTICAL:
+        reasons.append("Vertical dependency check failed")
+    if flags & FailureReason.STRUCT_STEEL:
+        reasons.append("Structure steel vertical dependency check failed")
+    if flags & FailureReason.CONCRETE_PILE:
+        reasons.append("Concrete/pile cap vertical dependency check failed")
+    if flags & FailureReason.HORIZONTAL:
+        if dependency_key:
+            reasons.append(f"{dependency_key} horizontal overlap check failed")
+        else:
+            reasons.append("Horizontal overlap check failed (< 80% overlap)")
+    return reasons
+
+# Whitespace runs collapsed to a single space when normalizing names
+_WS_RE = re.compile(r'\s+')
+
+# Whitespace that _simplify_for_rule_match would change (non-space, doubled, or at the ends)
+_NEEDS_SIMPLIFY_RE = re.compile(r'[^\S ]|  |^ | $')
+
+# Characters that may directly follow a dependency keyword without making it a qualifier
+_KEYWORD_END = r'\s*(?:$|[,\-–—;:])'
+
+# Pattern used for empty keywords, which never match
+_NEVER_RE = re.compile(r'(?!)')
+
+# Marks a missing dictionary entry where None is a valid stored value
+_SENTINEL = object()
+
+# Defaults for missing elevations, created once instead of per rule check
+_POS_INF = float('inf')
+_NEG_INF = float('-inf')
+
+
 # -----------------------------
 # Helper Functions
 # -----------------------------
 
+@lru_cache(maxsize=4096)
 def _simplify_for_rule_match(text: str) -> str:
     """
     Prepare an activity string for matching dependency 'keys'.
@@ -51,8 +141,28 @@ def _simplify_for_rule_match(text: str) -> str:
     Returns:
         Simplified text with collapsed spaces
     """
+    # Most names are already single-spaced and stripped
+    if not _NEEDS_SIMPLIFY_RE.search(text):
+        return text
     # Collapse spaces
-    return re.sub(r'\s+', ' ', text.strip()).strip()
+    return _WS_RE.sub(' ', text.strip())
+
+
+@lru_cache(maxsize=8192)
+def _normalize_phrase(text: str) -> str:
+    """
+    Lowercase a keyword or activity string and collapse its whitespace.
+    
+    Results are cached: the same predecessor names are normalized again for
+    every current activity they are checked against.
+    
+    Args:
+        text: The text to normalize
+        
+    Returns:
+        Normalized text used for keyword comparisons
+    """
+    return _WS_RE.sub(' ', text.strip().lower())
 
 
 def contains_dependency(dep_word: str, activity_text: str, allowed_phrases: Optional[List[str]] = None) -> bool:
@@ -73,33 +183,56 @@ def contains_dependency(dep_word: str, activity_text: str, allowed_phrases: Opti
     if not dep_word or not activity_text:
         return False
 
-    dep_word_clean = re.sub(r'\s+', ' ', dep_word.strip().lower())
-    text_clean = re.sub(r'\s+', ' ', activity_text.strip().lower())
-
-    idx = text_clean.find(dep_word_clean)
-    while idx != -1:
-        after = text_clean[idx + len(dep_word_clean):].strip()
+    # Normalize allowed phrases once instead of per occurrence
+    allowed_set = frozenset(_normalize_phrase(p) for p in allowed_phrases) if allowed_phrases else frozenset()
+    return contains_dependency_precleaned(_normalize_phrase(dep_word), _normalize_phrase(activity_text), allowed_set)
 
-        # If nothing after it → valid match
-        if not after:
-            return True
 
-        # If next char is punctuation/comma/dash → valid match
-        if after[0] in {",", "-", "–", "—", ";", ":"}:
-            return True
-
-        # Otherwise get the next token (word after dep_word)
-        next_word = after.split()[0]
-        combined = f"{dep_word_clean} {next_word}"
-
-        # Allow only if explicitly in allowed_phrases
-        if allowed_phrases and re.sub(r'\s+', ' ', combined.strip().lower()) in [re.sub(r'\s+', ' ', p.strip().lower()) for p in allowed_phrases]:
-            return True
+@lru_cache(maxsize=1024)
+def _dependency_regex(dep_word_clean: str, allowed_set: FrozenSet[str]) -> Pattern:
+    """
+    Compile the matcher for a normalized dependency keyword.
+    
+    The keyword matches when it is followed by nothing, by punctuation, or by
+    a next word that forms one of the allowed phrases.
+    
+    Args:
+        dep_word_clean: Normalized dependency keyword
+        allowed_set: Normalized phrases that can follow the keyword
+        
+    Returns:
+        Compiled regular expression to search normalized activity text with
+    """
+    if not dep_word_clean:
+        return _NEVER_RE
+    
+    prefix = dep_word_clean + " "
+    next_words = sorted(
+        p[len(prefix):] for p in allowed_set
+        if p.startswith(prefix) and p[len(prefix):] and " " not in p[len(prefix):]
+    )
+    endings = [_KEYWORD_END]
+    if next_words:
+        endings.append(r'\s*(?:' + '|'.join(re.escape(w) for w in next_words) + r')(?:\s|$)')
+    return re.compile(re.escape(dep_word_clean) + '(?=' + '|'.join(endings) + ')')
 
-        # Not allowed → skip this occurrence
-        idx = text_clean.find(dep_word_clean, idx + len(dep_word_clean))
 
-    return False
+def contains_dependency_precleaned(dep_word_clean: str, text_clean: str, allowed_set: FrozenSet[str]) -> bool:
+    """
+    Same matching as contains_dependency, for inputs that are already normalized.
+    
+    Callers that test several keywords against one activity normalize the
+    text once with _normalize_phrase and pass it to every call.
+    
+    Args:
+        dep_word_clean: Normalized dependency keyword
+        text_clean: Normalized activity text
+        allowed_set: Normalized phrases that can follow the keyword
+        
+    Returns:
+        True if dependency keyword is found and valid, False otherwise
+    """
+    return _dependency_regex(dep_word_clean, allowed_set).search(text_clean) is not None
 
 
 def has_80_percent_area_overlap(box1: Tuple[float, float, float, float], 
@@ -117,17 +250,22 @@ def has_80_percent_area_overlap(box1: Tuple[float, float, float, float],
     x_min1, x_max1, y_min1, y_max1 = box1
     x_min2, x_max2, y_min2, y_max2 = box2
     
-    overlap_x = max(0, min(x_max1, x_max2) - max(x_min1, x_min2))
-    overlap_y = max(0, min(y_max1, y_max2) - max(y_min1, y_min2))
+    # Plain comparisons in the argument order of min()/max(): a NaN in box2 is
+    # skipped and a NaN in box1 is kept, which fails the axis. Stop as soon as
+    # an axis has no overlap.
+    overlap_x = (x_max2 if x_max2 < x_max1 else x_max1) - (x_min2 if x_min2 > x_min1 else x_min1)
+    if not overlap_x > 0:
+        return False
+    overlap_y = (y_max2 if y_max2 < y_max1 else y_max1) - (y_min2 if y_min2 > y_min1 else y_min1)
+    if not overlap_y > 0:
+        return False
     overlap_area = overlap_x * overlap_y
     
     area1 = (x_max1 - x_min1) * (y_max1 - y_min1)
     area2 = (x_max2 - x_min2) * (y_max2 - y_min2)
     
-    percent1 = overlap_area / area1 if area1 > 0 else 0
-    percent2 = overlap_area / area2 if area2 > 0 else 0
-    
-    return percent1 >= HORIZONTAL_OVERLAP_THRESHOLD or percent2 >= HORIZONTAL_OVERLAP_THRESHOLD
+    return ((area1 > 0 and overlap_area / area1 >= HORIZONTAL_OVERLAP_THRESHOLD) or
+            (area2 > 0 and overlap_area / area2 >= HORIZONTAL_OVERLAP_THRESHOLD))
 
 
 def has_vertical_dependency(predecessor_max_z: float, current_min_z: float, 
@@ -151,6 +289,193 @@ def has_vertical_dependency(predecessor_max_z: float, current_min_z: float,
     return (current_min_z > predecessor_max_z - threshold1) and (current_min_z < predecessor_max_z + threshold2)
 
 
+try:
+    # Compiled versions of the two predicates above, if mei_rules_fast.pyx has been built
+    import mei_rules_fast
+except ImportError:
+    pass
+else:
+    has_80_percent_area_overlap = mei_rules_fast.has_80_percent_area_overlap
+    has_vertical_dependency = mei_rules_fast.has_vertical_dependency
+
+
+def _make_vdep(threshold1: float, threshold2: float):
+    """
+    Build has_vertical_dependency with its thresholds fixed.
+    
+    Args:
+        threshold1: Lower tolerance threshold
+        threshold2: Upper tolerance threshold
+        
+    Returns:
+        Function of (predecessor_max_z, current_min_z) returning a bool
+    """
+    def vdep(predecessor_max_z: float, current_min_z: float) -> bool:
+        return (current_min_z > predecessor_max_z - threshold1) and (current_min_z < predecessor_max_z + threshold2)
+    return vdep
+
+
+# Vertical dependency checks specialized per predecessor type
+_vdep_equipment = _make_vdep(*VERTICAL_THRESHOLDS["equipment"])
+_vdep_module = _make_vdep(*VERTICAL_THRESHOLDS["module"])
+_vdep_concrete = _make_vdep(*VERTICAL_THRESHOLDS["concrete"])
+_VDEP_BY_KIND = {"equipment": _vdep_equipment, "module": _vdep_module}
+
+
+# -----------------------------
+# Prepared Dependency Rules
+# -----------------------------
+
+def _freeze_dependencies(dependencies: Dict[str, List[str]]) -> Tuple[Tuple[str, Tuple[str, ...]], ...]:
+    """
+    Build a hashable snapshot of the dependency rules (insertion order kept).
+    
+    Args:
+        dependencies: Dictionary of dependency rules
+        
+    Returns:
+        Tuple of (dependency key, tuple of allowed phrases) pairs
+    """
+    return tuple((k, tuple(v or ())) for k, v in dependencies.items())
+
+
+@dataclass
+class _DependencyIndex:
+    """
+    Per-rule-set lookup data shared by the rule application functions.
+    
+    dep_keys are sorted by length (longest first for better matching) and
+    table maps each key to (normalized key, normalized allowed phrases,
+    compiled keyword matcher). phrase_patterns maps each key to the
+    matchers for its allowed phrases, used to test predecessor names.
+    special_keys keeps only the keys listed in SPECIAL_PREDECESSOR_TYPES,
+    in dep_keys order. automaton is a pyahocorasick automaton over the
+    normalized keys, or None.
+    """
+    dep_keys: Tuple[str, ...]
+    table: Dict[str, Tuple[str, FrozenSet[str], Pattern]]
+    phrase_patterns: Dict[str, Tuple[Pattern, ...]]
+    special_keys: Tuple[str, ...]
+    automaton: Any
+    special_memo: Dict[str, Optional[str]]
+
+
+def _build_key_automaton(dep_keys: Tuple[str, ...], table: Dict[str, Tuple[str, FrozenSet[str], Pattern]]) -> Any:
+    """
+    Build an Aho-Corasick automaton over the normalized dependency keys.
+    
+    Args:
+        dep_keys: Dependency keys in matching priority order
+        table: Prepared per-key data
+        
+    Returns:
+        Automaton yielding (rank, key) tuples, or None if pyahocorasick is
+        not installed or there are no keys
+    """
+    if ahocorasick is None:
+        return None
+    # Different keys can normalize to the same word, so collect them per word
+    by_word: Dict[str, List[Tuple[int, str]]] = {}
+    for rank, k in enumerate(dep_keys):
+        dep_word_clean = table[k][0]
+        if dep_word_clean:
+            by_word.setdefault(dep_word_clean, []).append((rank, k))
+    if not by_word:
+        return None
+    automaton = ahocorasick.Automaton()
+    for word, entries in by_word.items():
+        automaton.add_word(word, tuple(entries))
+    automaton.make_automaton()
+    return automaton
+
+
+@lru_cache(maxsize=8)
+def _prepare_dependencies(dep_items: Tuple[Tuple[str, Tuple[str, ...]], ...]) -> _DependencyIndex:
+    """
+    Precompute the per-rule-set data used by the rule application functions.
+    
+    Args:
+        dep_items: Snapshot of the dependency rules from _freeze_dependencies
+        
+    Returns:
+        _DependencyIndex for the rule set
+    """
+    dep_keys = tuple(sorted((k for k, _ in dep_items), key=len, reverse=True))
+    table = {}
+    phrase_patterns = {}
+    for k, phrases in dep_items:
+        dep_word_clean = _normalize_phrase(k)
+        allowed_set = frozenset(_normalize_phrase(p) for p in phrases)
+        table[k] = (dep_word_clean, allowed_set, _dependency_regex(dep_word_clean, allowed_set))
+        # Each allowed phrase is itself a keyword looked for in predecessor names
+        phrase_patterns[k] = tuple(_dependency_regex(_normalize_phrase(p), allowed_set) for p in phrases if p)
+    return _DependencyIndex(
+        dep_keys=dep_keys,
+        table=table,
+        phrase_patterns=phrase_patterns,
+        special_keys=tuple(k for k in dep_keys if k in SPECIAL_PREDECESSOR_TYPES),
+        automaton=_build_key_automaton(dep_keys, table),
+        special_memo={},
+    )
+
+
+# Last rule set seen by _get_dependency_index: (dependencies dict, its length, index).
+# Holding the dict itself keeps its id from being reused by another object.
+_last_dependency_index: Tuple[Any, int, Optional[_DependencyIndex]] = (None, -1, None)
+
+
+def _get_dependency_index(dependencies: Dict[str, List[str]]) -> _DependencyIndex:
+    """
+    Return the prepared index for a rule set, skipping the snapshot when the
+    same dictionary is passed again.
+    
+    Callers pass one dependencies dict for a whole run, so checking identity
+    and length avoids re-freezing and re-hashing every rule per call. Editing
+    the phrases of an existing key in place is not detected; build a new
+    dict instead.
+    
+    Args:
+        dependencies: Dictionary of dependency rules
+        
+    Returns:
+        _DependencyIndex for the rule set
+    """
+    global _last_dependency_index
+    cached_deps, cached_len, cached_index = _last_dependency_index
+    if cached_deps is dependencies and cached_len == len(dependencies):
+        return cached_index
+    index = _prepare_dependencies(_freeze_dependencies(dependencies))
+    _last_dependency_index = (dependencies, len(dependencies), index)
+    return index
+
+
+def _first_matching_key(index: _DependencyIndex, text_clean: str) -> Optional[str]:
+    """
+    Find the first key in dep_keys order that matches the normalized text.
+    
+    Args:
+        index: Prepared rule set
+        text_clean: Normalized activity text
+        
+    Returns:
+        The matching dependency key, or None
+    """
+    if index.automaton is None:
+        return next((k for k in index.dep_keys if index.table[k][2].search(text_clean)), None)
+    
+    # One pass finds every key occurrence; keep the valid one with the best rank
+    best_rank = len(index.dep_keys)
+    best_key = None
+    for end, entries in index.automaton.iter(text_clean):
+        for rank, k in entries:
+            if rank >= best_rank:
+                continue
+            dep_word_clean, _, pattern = index.table[k]
+            if pattern.match(text_clean, end - len(dep_word_clean) + 1):
+                best_rank, best_key = rank, k
+    return best_key
+
+
 # -----------------------------
 # Rule Application Functions
 # -----------------------------
@@ -166,16 +491,19 @@ def is_special_predecessor_type(predecessor_name: str, dependencies: Dict[str, L
     Returns:
         The dependency key if it's a special type, None otherwise
     """
-    # Get dependency keys sorted by length (longest first for better matching)
-    dep_keys = sorted(dependencies.keys(), key=len, reverse=True)
+    if not predecessor_name:
+        return None
+    index = _get_dependency_index(dependencies)
+    special_key = index.special_memo.get(predecessor_name, _SENTINEL)
+    if special_key is not _SENTINEL:
+        return special_key
+    text_clean = _normalize_phrase(predecessor_name)
     
-    # Check if predecessor matches any special type
-    for dep_key in dep_keys:
-        if contains_dependency(dep_key, predecessor_name, allowed_phrases=dependencies.get(dep_key, [])):
-            if dep_key in SPECIAL_PREDECESSOR_TYPES:
-                return dep_key
+    # Only special keys can be returned, so only those need to be tried
+    special_key = next((k for k in index.special_keys if index.table[k][2].search(text_clean)), None)
     
-    return None
+    index.special_memo[predecessor_name] = special_key
+    return special_key
 
 
 def check_equipment_predecessor_rules(predecessor: Dict[str, Any], current_activity: Dict[str, Any], 
@@ -189,62 +517,9 @@ def check_equipment_predecessor_rules(predecessor: Dict[str, Any], current_activ
         dependencies: Dictionary of dependency rules
         
     Returns:
-        Dictionary with validation results and failure reasons
+        Dictionary with validation results and failure reason flags
     """
-    result = {
-        "is_valid": False,
-        "failure_reasons": [],
-        "dependency_key": None
-    }
-    
-    # Check if predecessor is equipment
-    pred_is_equipment = bool(predecessor.get("TagNo"))
-    
-    if pred_is_equipment:
-        # Equipment predecessor - use standard rules
-        current_min_z = current_activity.get("MinOfMinZ", 0)
-        pred_max_z = predecessor.get("MaxOfMaxZ", float('inf'))
-        
-        if not has_vertical_dependency(pred_max_z, current_min_z, *VERTICAL_THRESHOLDS["equipment"]):
-            result["failure_reasons"].append("Vertical dependency check failed")
-            return result
-            
-        # Check horizontal overlap
-        if not _check_horizontal_overlap(current_activity, predecessor):
-            result["failure_reasons"].append("Horizontal overlap check failed (< 80% overlap)")
-            return result
-            
-        result["is_valid"] = True
-        return result
-    
-    # Check if predecessor is a special type
-    pred_key = is_special_predecessor_type(predecessor.get("ScheduleActivityID", ""), dependencies)
-    result["dependency_key"] = pred_key
-    
-    if not pred_key:
-        result["failure_reasons"].append("Not a qualifying predecessor type for equipment")
-        return result
-    
-    # Apply special type rules
-    if pred_key == "Primary Steel":
-        if not _check_structure_steel_rules(predecessor, current_activity):
-            result["failure_reasons"].append("Structure steel vertical dependency check failed")
-            return result
-    elif pred_key in ["Concrete", "Pile Caps", "Concrete Pile Caps"]:
-        if not _check_concrete_pile_cap_rules(predecessor, current_activity, "equipment"):
-            result["failure_reasons"].append("Concrete/pile cap vertical dependency check failed")
-            return result
-    else:
-        result["failure_reasons"].append("Not a qualifying predecessor type for equipment")
-        return result
-    
-    # Check horizontal overlap for special types
-    if not _check_horizontal_overlap(current_activity, predecessor):
-        result["failure_reasons"].append(f"{pred_key} horizontal overlap check failed")
-        return result
-    
-    result["is_valid"] = True
-    return result
+    return _check_eq_or_mod(predecessor, current_activity, dependencies, "equipment")
 
 
 def check_module_predecessor_rules(predecessor: Dict[str, Any], current_activity: Dict[str, Any], 
@@ -258,63 +533,9 @@ def check_module_predecessor_rules(predecessor: Dict[str, Any], current_activity
         dependencies: Dictionary of dependency rules
         
     Returns:
-        Dictionary with validation results and failure reasons
+        Dictionary with validation results and failure reason flags
     """
-    result = {
-        "is_valid": False,
-        "failure_reasons": [],
-        "dependency_key": None
-    }
-    
-    # Check if predecessor is equipment or module
-    pred_is_equipment = bool(predecessor.get("TagNo"))
-    pred_is_module = bool(predecessor.get("ModuleNo"))
-    
-    if pred_is_equipment or pred_is_module:
-        # Equipment or Module predecessor - use standard rules
-        current_min_z = current_activity.get("MinOfMinZ", 0)
-        pred_max_z = predecessor.get("MaxOfMaxZ", float('inf'))
-        
-        if not has_vertical_dependency(pred_max_z, current_min_z, *VERTICAL_THRESHOLDS["module"]):
-            result["failure_reasons"].append("Vertical dependency check failed")
-            return result
-            
-        # Check horizontal overlap
-        if not _check_horizontal_overlap(current_activity, predecessor):
-            result["failure_reasons"].append("Horizontal overlap check failed (< 80% overlap)")
-            return result
-            
-        result["is_valid"] = True
-        return result
-    
-    # Check if predecessor is a special type
-    pred_key = is_special_predecessor_type(predecessor.get("ScheduleActivityID", ""), dependencies)
-    result["dependency_key"] = pred_key
-    
-    if not pred_key:
-        result["failure_reasons"].append("Not a qualifying predecessor type for modules")
-        return result
-    
-    # Apply special type rules
-    if pred_key == "Primary Steel":
-        if not _check_structure_steel_rules(predecessor, current_activity):
-            result["failure_reasons"].append("Structure steel vertical dependency check failed")
-            return result
-    elif pred_key in ["Concrete", "Pile Caps", "Concrete Pile Caps"]:
-        if not _check_concrete_pile_cap_rules(predecessor, current_activity, "module"):
-            result["failure_reasons"].append("Concrete/pile cap vertical dependency check failed")
-            return result
-    else:
-        result["failure_reasons"].append("Not a qualifying predecessor type for modules")
-        return result
-    
-    # Check horizontal overlap for special types
-    if not _check_horizontal_overlap(current_activity, predecessor):
-        result["failure_reasons"].append(f"{pred_key} horizontal overlap check failed")
-        return result
-    
-    result["is_valid"] = True
-    return result
+    return _check_eq_or_mod(predecessor, current_activity, dependencies, "module")
 
 
 def check_standard_predecessor_rules(predecessor: Dict[str, Any], current_activity: Dict[str, Any], 
@@ -328,30 +549,33 @@ def check_standard_predecessor_rules(predecessor: Dict[str, Any], current_activi
         dependencies: Dictionary of dependency rules
         
     Returns:
-        Dictionary with validation results and failure reasons
+        Dictionary with validation results and failure reason flags
     """
     result = {
         "is_valid": False,
-        "failure_reasons": [],
+        "failure_reasons_flags": FailureReason(0),
         "dependency_key": None
     }
     
     # For standard activities, find dependency key by matching the CURRENT ACTIVITY name
     current_activity_name = current_activity.get("ScheduleActivityID", "")
-    dep_keys = sorted(dependencies.keys(), key=len, reverse=True)
+    index = _get_dependency_index(dependencies)
+    # _normalize_phrase already strips and collapses whitespace
+    current_clean = _normalize_phrase(current_activity_name)
     
-    dep_key = next((k for k in dep_keys if contains_dependency(k, _simplify_for_rule_match(current_activity_name), 
-                                                               allowed_phrases=dependencies.get(k, []))), None)
+    dep_key = _first_matching_key(index, current_clean)
     result["dependency_key"] = dep_key
     
     if not dep_key:
-        result["failure_reasons"].append("No dependency key found for current activity")
+        result["failure_reasons_flags"] |= FailureReason.NO_DEP_KEY
         return result
     
     # Check if this predecessor matches the dependency rule
-    preds = dependencies.get(dep_key, [])
-    if not any(contains_dependency(pname, predecessor.get("ScheduleActivityID", ""), allowed_phrases=preds) for pname in preds):
-        result["failure_reasons"].append("Dependency rule matching failed")
+    predecessor_name = predecessor.get("ScheduleActivityID", "")
+    # Normalize the predecessor name once for all phrases of the rule
+    predecessor_clean = _normalize_phrase(predecessor_name) if predecessor_name else ""
+    if not any(pattern.search(predecessor_clean) for pattern in index.phrase_patterns[dep_key]):
+        result["failure_reasons_flags"] |= FailureReason.DEP_RULE
         return result
     
     result["is_valid"] = True
@@ -362,6 +586,98 @@ def check_standard_predecessor_rules(predecessor: Dict[str, Any], current_activi
 # Private Helper Functions
 # -----------------------------
 
+def _check_eq_or_mod(predecessor: Dict[str, Any], current_activity: Dict[str, Any], 
+                     dependencies: Dict[str, List[str]], kind: str) -> Dict[str, Any]:
+    """
+    Shared rule check for equipment and module activities.
+    
+    Args:
+        predecessor: Predecessor activity data
+        current_activity: Current activity data
+        dependencies: Dictionary of dependency rules
+        kind: Type of current activity ("equipment" or "module")
+        
+    Returns:
+        Dictionary with validation results and failure reason flags
+    """
+    result = {
+        "is_valid": False,
+        "failure_reasons_flags": FailureReason(0),
+        "dependency_key": None
+    }
+    
+    # Equipment predecessors use standard rules; modules also accept module predecessors
+    pred_is_standard = bool(predecessor.get("TagNo")) or (kind == "module" and bool(predecessor.get("ModuleNo")))
+    
+    if pred_is_standard:
+        failure = _standard_eq_mod_failure(predecessor, current_activity, kind)
+    else:
+        pred_key = is_special_predecessor_type(predecessor.get("ScheduleActivityID", ""), dependencies)
+        result["dependency_key"] = pred_key
+        failure = _special_type_failure(predecessor, current_activity, pred_key, kind)
+    
+    result["failure_reasons_flags"] = failure
+    result["is_valid"] = not failure
+    return result
+
+
+def _standard_eq_mod_failure(predecessor: Dict[str, Any], current_activity: Dict[str, Any], 
+                             kind: str) -> FailureReason:
+    """
+    Apply the standard rules to an equipment or module predecessor.
+    
+    Args:
+        predecessor: Predecessor activity data
+        current_activity: Current activity data
+        kind: Type of current activity ("equipment" or "module")
+        
+    Returns:
+        Failure flags, empty if the predecessor is valid
+    """
+    current_min_z = current_activity.get("MinOfMinZ", 0)
+    pred_max_z = predecessor.get("MaxOfMaxZ", _POS_INF)
+    
+    if not _VDEP_BY_KIND[kind](pred_max_z, current_min_z):
+        return FailureReason.VERTICAL
+    
+    if not _check_horizontal_overlap(current_activity, predecessor):
+        return FailureReason.HORIZONTAL
+    
+    return FailureReason(0)
+
+
+def _special_type_failure(predecessor: Dict[str, Any], current_activity: Dict[str, Any], 
+                          pred_key: Optional[str], kind: str) -> FailureReason:
+    """
+    Apply the special predecessor type rules (steel, concrete, pile caps).
+    
+    Args:
+        predecessor: Predecessor activity data
+        current_activity: Current activity data
+        pred_key: Special type found by is_special_predecessor_type
+        kind: Type of current activity ("equipment" or "module")
+        
+    Returns:
+        Failure flags, empty if the predecessor is valid
+    """
+    if not pred_key:
+        return FailureReason.NOT_QUALIFYING
+    
+    if pred_key == "Primary Steel":
+        if not _check_structure_steel_rules(predecessor, current_activity):
+            return FailureReason.STRUCT_STEEL
+    elif pred_key in ["Concrete", "Pile Caps", "Concrete Pile Caps"]:
+        if not _check_concrete_pile_cap_rules(predecessor, current_activity, kind):
+            return FailureReason.CONCRETE_PILE
+    else:
+        return FailureReason.NOT_QUALIFYING
+    
+    if not _check_horizontal_overlap(current_activity, predecessor):
+        return FailureReason.HORIZONTAL
+    
+    return FailureReason(0)
+
+
 def _check_horizontal_overlap(current_activity: Dict[str, Any], predecessor: Dict[str, Any]) -> bool:
     """
     Check if two activities have sufficient horizontal overlap.
@@ -373,20 +689,14 @@ def _check_horizontal_overlap(current_activity: Dict[str, Any], predecessor: Dic
     Returns:
         True if horizontal overlap check passes, False otherwise
     """
-    # Check if both activities have coordinates
-    current_has_coords = all(col in current_activity for col in ["MinOfMinX", "MaxOfMaxX", "MinOfMinY", "MaxOfMaxY"])
-    pred_has_coords = all(col in predecessor for col in ["MinOfMinX", "MaxOfMaxX", "MinOfMinY", "MaxOfMaxY"])
-    
-    if not current_has_coords:
+    # Create bounding boxes; a missing coordinate on either side fails the check
+    try:
+        current_box = (current_activity["MinOfMinX"], current_activity["MaxOfMaxX"], 
+                       current_activity["MinOfMinY"], current_activity["MaxOfMaxY"])
+        pred_box = (predecessor["MinOfMinX"], predecessor["MaxOfMaxX"], 
+                    predecessor["MinOfMinY"], predecessor["MaxOfMaxY"])
+    except KeyError:
         return False
-    if not pred_has_coords:
-        return False
-    
-    # Create bounding boxes
-    current_box = (current_activity["MinOfMinX"], current_activity["MaxOfMaxX"], 
-                   current_activity["MinOfMinY"], current_activity["MaxOfMaxY"])
-    pred_box = (predecessor["MinOfMinX"], predecessor["MaxOfMaxX"], 
-                predecessor["MinOfMinY"], predecessor["MaxOfMaxY"])
     
     return has_80_percent_area_overlap(current_box, pred_box)
 
@@ -403,8 +713,8 @@ def _check_structure_steel_rules(predecessor: Dict[str, Any], current_activity:
         True if structure steel rules pass, False otherwise
     """
     current_min_z = current_activity.get("MinOfMinZ", 0)
-    pred_min_z = predecessor.get("MinOfMinZ", float('-inf'))
-    pred_max_z = predecessor.get("MaxOfMaxZ", float('inf'))
+    pred_min_z = predecessor.get("MinOfMinZ", _NEG_INF)
+    pred_max_z = predecessor.get("MaxOfMaxZ", _POS_INF)
     
     # Check vertical dependency: Min Z of Current >= Min Z of Steel AND < Max Z of Steel
     return pred_min_z <= current_min_z < pred_max_z
@@ -424,11 +734,9 @@ def _check_concrete_pile_cap_rules(predecessor: Dict[str, Any], current_activity
         True if concrete/pile cap rules pass, False otherwise
     """
     current_min_z = current_activity.get("MinOfMinZ", 0)
-    pred_max_z = predecessor.get("MaxOfMaxZ", float('inf'))
+    pred_max_z = predecessor.get("MaxOfMaxZ", _POS_INF)
     
     if activity_type == "equipment":
-        thresholds = VERTICAL_THRESHOLDS["concrete"]
-    else:  # module
-        thresholds = VERTICAL_THRESHOLDS["module"]
-    
-    return has_vertical_dependency(pred_max_z, current_min_z, *thresholds)
+        return _vdep_concrete(pred_max_z, current_min_z)
+    # module
+    return _vdep_module(pred_max_z, current_min_z)
@@ -0,0 +1,64 @@
+# cython: language_level=3, boundscheck=False, wraparound=False, cdivision=True
+"""
+MEI Rules Compiled Geometry Predicates
+
+Cython versions of the geometry predicates in mei_rules.py. When this module
+has been compiled, mei_rules uses these versions and otherwise keeps its pure
+Python ones. Build it in place (next to mei_rules.py) with:
+
+    cythonize -i mei_rules_fast.pyx
+
+"""
+
+# Must stay in sync with HORIZONTAL_OVERLAP_THRESHOLD in mei_rules.py
+cdef double HORIZONTAL_OVERLAP_THRESHOLD = 0.8
+
+
+cpdef bint has_80_percent_area_overlap(box1, box2):
+    """
+    Calculate if two boxes have at least 80% area overlap.
+
+    Args:
+        box1: Tuple of (x_min, x_max, y_min, y_max) coordinates
+        box2: Tuple of (x_min, x_max, y_min, y_max) coordinates
+
+    Returns:
+        True if either box has at least 80% overlap with the other
+    """
+    cdef double x_min1, x_max1, y_min1, y_max1
+    cdef double x_min2, x_max2, y_min2, y_max2
+    cdef double overlap_x, overlap_y, overlap_area, area1, area2
+
+    x_min1, x_max1, y_min1, y_max1 = box1
+    x_min2, x_max2, y_min2, y_max2 = box2
+
+    # Same argument order as min()/max() in mei_rules.py, so NaN is handled the same way
+    overlap_x = (x_max2 if x_max2 < x_max1 else x_max1) - (x_min2 if x_min2 > x_min1 else x_min1)
+    if not overlap_x > 0:
+        return False
+    overlap_y = (y_max2 if y_max2 < y_max1 else y_max1) - (y_min2 if y_min2 > y_min1 else y_min1)
+    if not overlap_y > 0:
+        return False
+    overlap_area = overlap_x * overlap_y
+
+    area1 = (x_max1 - x_min1) * (y_max1 - y_min1)
+    area2 = (x_max2 - x_min2) * (y_max2 - y_min2)
+    return ((area1 > 0 and overlap_area / area1 >= HORIZONTAL_OVERLAP_THRESHOLD) or
+            (area2 > 0 and overlap_area / area2 >= HORIZONTAL_OVERLAP_THRESHOLD))
+
+
+cpdef bint has_vertical_dependency(double predecessor_max_z, double current_min_z,
+                                   double threshold1=0, double threshold2=0.2):
+    """
+    Check if the predecessor has a vertical dependency with the current activity.
+
+    Args:
+        predecessor_max_z: Maximum Z coordinate of the predecessor activity
+        current_min_z: Minimum Z coordinate of the current activity
+        threshold1: Lower tolerance threshold (default: 0m)
+        threshold2: Upper tolerance threshold (default: 0.2m)
+
+    Returns:
+        True if there is a vertical dependency, False otherwise
+    """
+    return (current_min_z > predecessor_max_z - threshold1) and (current_min_z < predecessor_max_z + threshold2)
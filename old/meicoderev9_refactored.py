@@ -12,9 +12,20 @@ Author: MEI System
 Date: 2025
 """
 
+import numpy as np
 import pandas as pd
+import multiprocessing
 import os
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from functools import lru_cache, partial
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:
+    # pyarrow is optional; without it the CSV is written by pandas
+    pa = None
 
 # Import from our new modules
 from mei_rules import (
@@ -22,9 +33,24 @@ from mei_rules import (
     check_module_predecessor_rules,
     check_standard_predecessor_rules,
     contains_dependency,
-    _simplify_for_rule_match,
+    _freeze_dependencies,
+    _first_matching_key,
+    _normalize_phrase,
+    _prepare_dependencies,
     has_80_percent_area_overlap,
-    has_vertical_dependency
+    has_vertical_dependency,
+    HORIZONTAL_OVERLAP_THRESHOLD
+)
+from mei_kernels import (
+    HAVE_NUMBA,
+    special_predecessor_pairs,
+    CURRENT_STANDARD,
+    CURRENT_EQUIPMENT,
+    CURRENT_MODULE,
+    RULE_NONE,
+    RULE_STANDARD,
+    RULE_STEEL,
+    RULE_CONCRETE
 )
 from db_utils import (
     load_dependency_rules,
@@ -36,340 +62,664 @@ from db_utils import (
 
 
 # -----------------------------
-# Main Processing Functions
+# Vectorized Predecessor Checks
 # -----------------------------
 
-def process_activities(df: pd.DataFrame, dependencies: dict, id_to_name: dict, name_to_id: dict, full_name_to_id: dict) -> list:
+# Bounding box columns needed for the horizontal overlap check
+COORD_COLUMNS = ["MinOfMinX", "MaxOfMaxX", "MinOfMinY", "MaxOfMaxY"]
+
+# Groups smaller than this keep the per-row predecessor loop
+VECTORIZE_MIN_GROUP = 8
+
+# Inputs smaller than this are processed without worker processes
+PARALLEL_MIN_ACTIVITIES = 2000
+
+# Columns read for each activity row, with the value used when a column is missing
+ROW_DEFAULTS = {
+    "ScheduleActivityID": "",
+    "Discipline": "",
+    "TagNo": None,
+    "ModuleNo": None,
+    "MinOfMinZ": 0,
+    "MaxOfMaxZ": float('inf'),
+    "MinOfMinX": np.nan,
+    "MaxOfMaxX": np.nan,
+    "MinOfMinY": np.nan,
+    "MaxOfMaxY": np.nan,
+}
+
+# Boolean columns marking equipment (TagNo) and module (ModuleNo) activities,
+# added by process_activities before grouping
+EQUIPMENT_FLAG = "_is_equipment"
+MODULE_FLAG = "_is_module"
+
+
+def _flag_column(df: pd.DataFrame, col: str) -> np.ndarray:
     """
-    Find predecessors for each activity within its CWA/SubArea group.
+    Vectorized `pd.notna(value) and value != ""` for an optional column.
+    """
+    if col not in df.columns:
+        return np.zeros(len(df), dtype=bool)
+    values = df[col]
+    return (values.notna() & (values != "")).to_numpy(dtype=bool)
+
+
+@lru_cache(maxsize=8)
+def _dependency_key_matcher(dep_items: tuple):
+    """
+    Build a memoized lookup of the dependency key an activity name matches.
     
-    This function processes activities and applies dependency rules to find valid predecessors.
-    It handles three types of activities differently:
-    - Equipment: Uses special rules for concrete, steel, pile caps, etc.
-    - Module: Uses special rules similar to equipment
-    - Standard: Uses standard dependency matching rules
+    The same names recur across groups and are classified both as current
+    activities and as predecessors, so each name is matched once per rule set
+    (and per worker process).
     
     Args:
-        df: DataFrame containing activities data
-        dependencies: Dictionary of dependency rules
-        id_to_name: Mapping from ID to name
-        name_to_id: Mapping from name to ID
-        full_name_to_id: Mapping from full name to ID
+        dep_items: Snapshot of the dependency rules from _freeze_dependencies
         
     Returns:
-        List of dependency relationships found
+        Function mapping an activity name to its first matching key (longest
+        key first) or None
     """
-    df = df.copy()
-    df["ScheduleActivityID"] = df["ScheduleActivityID"].astype(str)
-    df["Rel"] = df.get("Rel", "FS")
-    df["TaskType"] = df.get("TaskType", "Construct")
-    df["Discipline"] = df.get("Discipline", "")
+    # The prepared index scans each name once with the keyword automaton
+    index = _prepare_dependencies(dep_items)
+    
+    @lru_cache(maxsize=None)
+    def match(name: str):
+        return _first_matching_key(index, _normalize_phrase(name))
+    
+    return match
 
-    df.sort_values(by=["CWA", "MinOfMinZ"], inplace=True)
-    group_cols = ["CWA"] + (["SubArea"] if "SubArea" in df.columns else [])
 
-    results = []
-    dep_keys = sorted(dependencies.keys(), key=len, reverse=True)
+def _predecessor_keys(group: pd.DataFrame, key_of) -> list:
+    """
+    Find the dependency key that classifies each row of a group as a predecessor.
+    
+    Args:
+        group: Activities of one CWA/SubArea group
+        key_of: Name lookup from _dependency_key_matcher
+        
+    Returns:
+        List aligned with the group rows; the first matching key or None
+    """
+    return [key_of(sid) for sid in group["ScheduleActivityID"].tolist()]
+
+
+def _predecessor_rules(group: pd.DataFrame, pred_keys: list) -> tuple:
+    """
+    Work out which vertical rule each row falls under as a predecessor.
+    
+    Args:
+        group: Activities of one CWA/SubArea group
+        pred_keys: Predecessor key of each row from _predecessor_keys
+        
+    Returns:
+        Tuple of (equipment_rule, module_rule) arrays of RULE_* codes, for
+        equipment and module current activities respectively
+    """
+    has_key = np.array([bool(k) for k in pred_keys], dtype=bool)
+    is_structure_steel = np.array([k == "Primary Steel" for k in pred_keys], dtype=bool)
+    is_concrete_or_pile_cap = np.array([k in ("Concrete", "Pile Caps", "Concrete Pile Caps") for k in pred_keys], dtype=bool)
+    pred_is_equipment = group[EQUIPMENT_FLAG].to_numpy()
+    pred_is_module = group[MODULE_FLAG].to_numpy()
+    
+    # Equipment and module predecessors come first, then steel, then concrete/pile caps
+    special_rule = np.where(is_structure_steel, RULE_STEEL, np.where(is_concrete_or_pile_cap, RULE_CONCRETE, RULE_NONE))
+    equipment_rule = np.where(pred_is_equipment, RULE_STANDARD, special_rule)
+    # Modules use the standard thresholds for concrete and pile caps too
+    module_rule = np.where(pred_is_equipment | pred_is_module, RULE_STANDARD,
+                           np.where(special_rule == RULE_CONCRETE, RULE_STANDARD, special_rule))
+    return (np.where(has_key, equipment_rule, RULE_NONE).astype(np.int8),
+            np.where(has_key, module_rule, RULE_NONE).astype(np.int8))
+
+
+def _special_predecessor_masks(group: pd.DataFrame, current_kind: np.ndarray,
+                               equipment_rule: np.ndarray, module_rule: np.ndarray) -> np.ndarray:
+    """
+    NumPy version of mei_kernels.special_predecessor_pairs.
+    
+    Applies the same checks as the per-row loop in process_activities, as
+    broadcasts of the current activities (rows) against the predecessors
+    (columns).
+    
+    Args:
+        group: Activities of one CWA/SubArea group, sorted and reindexed
+        current_kind: CURRENT_* code of each row
+        equipment_rule: RULE_* codes for equipment current activities
+        module_rule: RULE_* codes for module current activities
+        
+    Returns:
+        N×N boolean array; [i, j] is True if row j is a valid predecessor of row i
+    """
+    n = len(group)
+    min_z = group["MinOfMinZ"].to_numpy(dtype=float)
+    max_z = group["MaxOfMaxZ"].to_numpy(dtype=float) if "MaxOfMaxZ" in group.columns else np.full(n, np.inf)
+    current_min_z = min_z[:, None]
+    pred_min_z = min_z[None, :]
+    pred_max_z = max_z[None, :]
+    
+    def vertical(threshold1: float, threshold2: float) -> np.ndarray:
+        return (current_min_z > pred_max_z - threshold1) & (current_min_z < pred_max_z + threshold2)
+    
+    x_min, x_max, y_min, y_max = (group[col].to_numpy(dtype=float) for col in COORD_COLUMNS)
+    
+    def overlap_extent(lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+        # min()/max() argument order of has_80_percent_area_overlap: a NaN side of
+        # the predecessor (column) is skipped, a NaN side of the current row is kept
+        cur_lo, cur_hi, pred_lo, pred_hi = lo[:, None], hi[:, None], lo[None, :], hi[None, :]
+        return np.where(pred_hi < cur_hi, pred_hi, cur_hi) - np.where(pred_lo > cur_lo, pred_lo, cur_lo)
+    
+    overlap_x = overlap_extent(x_min, x_max)
+    overlap_y = overlap_extent(y_min, y_max)
+    overlap_area = np.where((overlap_x > 0) & (overlap_y > 0), overlap_x * overlap_y, 0.0)
+    area = (x_max - x_min) * (y_max - y_min)
+    current_area = area[:, None]
+    pred_area = area[None, :]
+    # Same test as has_80_percent_area_overlap
+    with np.errstate(divide="ignore", invalid="ignore"):
+        overlap = (((current_area > 0) & (overlap_area / current_area >= HORIZONTAL_OVERLAP_THRESHOLD)) |
+                   ((pred_area > 0) & (overlap_area / pred_area >= HORIZONTAL_OVERLAP_THRESHOLD)))
+    
+    # Rule of each pair, picked by the type of the current activity
+    rule = np.where((current_kind == CURRENT_EQUIPMENT)[:, None], equipment_rule[None, :], module_rule[None, :])
+    rule[current_kind == CURRENT_STANDARD] = RULE_NONE
+    vertical_ok = np.where(
+        rule == RULE_STANDARD, vertical(0, 0.2),
+        np.where(rule == RULE_STEEL, (pred_min_z <= current_min_z) & (current_min_z < pred_max_z),
+                 (rule == RULE_CONCRETE) & vertical(0.5, 0.2)))
+    
+    # Skip pairs of the same activity, compared by name as in the row loop
+    codes = pd.factorize(group["ScheduleActivityID"])[0]
+    return (codes[:, None] != codes[None, :]) & vertical_ok & overlap
+
+
+def _special_predecessor_pairs(group: pd.DataFrame, pred_keys: list) -> tuple:
+    """
+    Evaluate the equipment and module predecessor rules for every pair in a group.
+    
+    Uses the compiled kernel from mei_kernels when numba is installed and
+    the NumPy masks otherwise.
+    
+    Args:
+        group: Activities of one CWA/SubArea group, sorted and reindexed
+        pred_keys: Predecessor key of each row from _predecessor_keys
+        
+    Returns:
+        Tuple of (bounds, pred_rows); the valid predecessors of row i are
+        the rows pred_rows[bounds[i]:bounds[i + 1]], in group order
+    """
+    n = len(group)
+    if not all(col in group.columns for col in COORD_COLUMNS):
+        # No coordinates - horizontal check fails for every pair
+        return np.zeros(n + 1, dtype=np.intp), np.empty(0, dtype=np.intp)
+    
+    is_equipment = group[EQUIPMENT_FLAG].to_numpy()
+    is_module = group[MODULE_FLAG].to_numpy()
+    current_kind = np.where(is_equipment, CURRENT_EQUIPMENT,
+                            np.where(is_module, CURRENT_MODULE, CURRENT_STANDARD)).astype(np.int8)
+    equipment_rule, module_rule = _predecessor_rules(group, pred_keys)
+    
+    if HAVE_NUMBA:
+        name_codes = pd.factorize(group["ScheduleActivityID"])[0]
+        min_z = group["MinOfMinZ"].to_numpy(dtype=float)
+        max_z = group["MaxOfMaxZ"].to_numpy(dtype=float) if "MaxOfMaxZ" in group.columns else np.full(n, np.inf)
+        x_min, x_max, y_min, y_max = (group[col].to_numpy(dtype=float) for col in COORD_COLUMNS)
+        rows, pred_rows = special_predecessor_pairs(current_kind, equipment_rule, module_rule, name_codes,
+                                                    min_z, max_z, x_min, x_max, y_min, y_max)
+    else:
+        rows, pred_rows = np.nonzero(_special_predecessor_masks(group, current_kind, equipment_rule, module_rule))
+    return np.searchsorted(rows, np.arange(n + 1)), pred_rows
 
-    for _, group in df.groupby(group_cols):
-        group = group.sort_values("MinOfMinZ").reset_index(drop=True)
 
-        for _, act in group.iterrows():
-            # Check if current activity is equipment (has TagNo)
-            is_equipment = pd.notna(act.get("TagNo")) and act.get("TagNo") != ""
-            # Check if current activity is module (has ModuleNo)
-            is_module = pd.notna(act.get("ModuleNo")) and act.get("ModuleNo") != ""
+def _vertical_reach_order(max_z: np.ndarray) -> tuple:
+    """
+    Order the rows of a group by how high they reach as predecessors.
+    
+    Every vertical rule needs current_min_z < max_z + 0.2 (the steel rule's
+    current_min_z < max_z implies it), so the possible predecessors of an
+    activity are a suffix of this order, found with np.searchsorted.
+    
+    Args:
+        max_z: MaxOfMaxZ of each row
+        
+    Returns:
+        Tuple of (order, sorted_reach); rows order[k:] are the candidates
+        for k = np.searchsorted(sorted_reach, current_min_z, side="right")
+    """
+    # NaN never passes a vertical check, so it is sorted out of reach
+    reach = np.where(np.isnan(max_z), -np.inf, max_z + 0.2)
+    order = np.argsort(reach, kind="stable")
+    return order, reach[order]
+
+
+def _standard_predecessor_names(group: pd.DataFrame, preds: list) -> np.ndarray:
+    """
+    Find the activities of a group that match any predecessor phrase of a rule.
+    
+    Names are ordered by the first phrase they match (in rule order) and then
+    by group position, each name once - the order the per-phrase filtering
+    and drop_duplicates produced.
+    
+    Args:
+        group: Activities of one CWA/SubArea group
+        preds: Predecessor phrases of the dependency rule
+        
+    Returns:
+        Array of matching ScheduleActivityID values
+    """
+    sids = group["ScheduleActivityID"]
+    unmatched = len(preds)
+    first_match = np.full(len(group), unmatched)
+    for rank, pname in enumerate(preds):
+        # Rows already matched by an earlier phrase keep that position
+        remaining = first_match == unmatched
+        if not remaining.any():
+            break
+        hit = sids[remaining].map(lambda x: contains_dependency(pname, x, allowed_phrases=preds)).to_numpy(dtype=bool)
+        first_match[np.flatnonzero(remaining)[hit]] = rank
+    
+    order = np.argsort(first_match, kind="stable")
+    order = order[first_match[order] < unmatched]
+    return pd.unique(sids.to_numpy()[order])
+
+
+def _write_csv(df: pd.DataFrame, output_file: str) -> None:
+    """
+    Write a DataFrame to CSV without its index, as DataFrame.to_csv does.
+    
+    Uses pyarrow's C++ writer when it is installed. pyarrow quotes every
+    string unless quoting is off, while pandas only quotes values that need
+    it, so pyarrow writes without quotes and pandas takes over whenever a
+    value contains a comma, a quote or a line break. NaN is written as an
+    empty string either way.
+    
+    Args:
+        df: DataFrame to write
+        output_file: Output CSV path
+    """
+    if pa is not None:
+        table = pa.Table.from_pandas(df.fillna("").astype(str), preserve_index=False)
+        options = pa_csv.WriteOptions(quoting_style="none", quoting_header="none", eol=os.linesep)
+        try:
+            pa_csv.write_csv(table, output_file, write_options=options)
+            return
+        except pa.ArrowInvalid:
+            # Some value needs quoting
+            pass
+    df.to_csv(output_file, index=False)
+
+
+# -----------------------------
+# Main Processing Functions
+# -----------------------------
+
+def _process_group(group: pd.DataFrame, dependencies: dict, dep_items: tuple,
+                   has_coordinates: bool) -> tuple:
+    """
+    Find predecessors for the activities of one CWA/SubArea group.
+    
+    Groups are independent, so this runs in worker processes for large inputs.
+    
+    Args:
+        group: Activities of one CWA/SubArea group
+        dependencies: Dictionary of dependency rules
+        dep_items: Snapshot of the dependency rules from _freeze_dependencies
+        has_coordinates: Whether the bounding box columns are present
+        
+    Returns:
+        Tuple of (activity names, predecessor names, activity disciplines)
+        lists, one entry per dependency found in the group, without repeats
+    """
+    # Edges are kept column by column rather than as one dict per edge
+    edge_acts, edge_preds, edge_disciplines = [], [], []
+    # (activity, predecessor) pairs already emitted
+    seen_edges = set()
+    
+    group = group.sort_values("MinOfMinZ").reset_index(drop=True)
+    
+    # Classify predecessors once per group, only when some activity uses the special rules
+    equipment_flags = group[EQUIPMENT_FLAG].to_numpy()
+    module_flags = group[MODULE_FLAG].to_numpy()
+    has_special = (equipment_flags | module_flags).any()
+    key_of = _dependency_key_matcher(dep_items)
+    pred_keys = _predecessor_keys(group, key_of) if has_special else []
+    
+    # Larger groups check all equipment/module pairs at once
+    vectorized = has_special and len(group) >= VECTORIZE_MIN_GROUP
+    if vectorized:
+        pair_bounds, pair_preds = _special_predecessor_pairs(group, pred_keys)
+        group_sids = group["ScheduleActivityID"].to_numpy()
+    
+    # Standard-rule matches per dependency key, filled on first use
+    standard_matches = {}
+    
+    # Plain tuples instead of one Series per row; missing columns get their defaults
+    missing = {col: value for col, value in ROW_DEFAULTS.items() if col not in group.columns}
+    filled = group.assign(**missing)[list(ROW_DEFAULTS)]
+    rows = list(filled.itertuples(index=False))
+    
+    # Predecessor values read by position in the per-row loops
+    sids = filled["ScheduleActivityID"].tolist()
+    min_z = filled["MinOfMinZ"].to_numpy(dtype=float).tolist()
+    max_z = filled["MaxOfMaxZ"].to_numpy(dtype=float).tolist()
+    x_min, x_max, y_min, y_max = (filled[col].to_numpy(dtype=float).tolist() for col in COORD_COLUMNS)
+    equipment_flags = equipment_flags.tolist()
+    module_flags = module_flags.tolist()
+    reach_order, sorted_reach = _vertical_reach_order(np.asarray(max_z))
+
+    for i, act in enumerate(rows):
+        # Check if current activity is equipment (has TagNo)
+        is_equipment = equipment_flags[i]
+        # Check if current activity is module (has ModuleNo)
+        is_module = module_flags[i]
+        
+        if vectorized and (is_equipment or is_module):
+            valid_preds = group_sids[pair_preds[pair_bounds[i]:pair_bounds[i + 1]]]
+            for pred_sid in valid_preds:
+                # Skip dependencies that were already added
+                edge = (act.ScheduleActivityID, pred_sid)
+                if edge in seen_edges:
+                    continue
+                seen_edges.add(edge)
+                edge_acts.append(act.ScheduleActivityID)
+                edge_preds.append(pred_sid)
+                edge_disciplines.append(act.Discipline)
+        # Special equipment rule: If current activity is equipment, only follow special rules
+        elif is_equipment:
+            # Without coordinate columns the horizontal check fails for every predecessor
+            if not has_coordinates:
+                continue
+            current_min_z = min_z[i]
+            current_box = (x_min[i], x_max[i], y_min[i], y_max[i])
             
-            # Special equipment rule: If current activity is equipment, only follow special rules
-            if is_equipment:
-                current_min_z = act.get("MinOfMinZ", 0)
-                # Create bounding box for current activity if coordinate columns exist
-                has_coordinates = all(col in act for col in ["MinOfMinX", "MaxOfMaxX", "MinOfMinY", "MaxOfMaxY"])
-                current_box = None
-                if has_coordinates:
-                    current_box = (act["MinOfMinX"], act["MaxOfMaxX"], act["MinOfMinY"], act["MaxOfMaxY"])
+            # Check the other activities of the group that reach high enough to be predecessors
+            start = np.searchsorted(sorted_reach, current_min_z, side="right")
+            for j in sorted(reach_order[start:].tolist()):
+                # Skip if it's the same activity
+                if sids[j] == act.ScheduleActivityID:
+                    continue
+                    
+                # Predecessor type, identified once per group with the same approach as default logic
+                pred_key = pred_keys[j]
                 
-                # Check all other activities in the same group as potential predecessors
-                for _, pred in group.iterrows():
-                    # Skip if it's the same activity
-                    if pred["ScheduleActivityID"] == act["ScheduleActivityID"]:
-                        continue
-                        
-                    # Identify predecessor type using the same approach as default logic
-                    pred_key = next((k for k in dep_keys if contains_dependency(k, _simplify_for_rule_match(pred["ScheduleActivityID"]), allowed_phrases=dependencies.get(k, []))), None)
+                # Apply rules based on predecessor type
+                if pred_key:
+                    # Check if predecessor is Equipment (has TagNo)
+                    pred_is_equipment = equipment_flags[j]
                     
-                    # Apply rules based on predecessor type
-                    if pred_key:
-                        # Check if predecessor is Equipment (has TagNo)
-                        pred_is_equipment = pd.notna(pred.get("TagNo")) and pred.get("TagNo") != ""
-                        
-                        # Check if predecessor is Structure Steel
-                        is_structure_steel = pred_key == "Primary Steel"
-                        
-                        # Check if predecessor is Concrete
-                        is_concrete = pred_key == "Concrete"
-                        
-                        # Check if predecessor is Pile Cap
-                        is_pile_cap = pred_key == "Pile Caps" or pred_key == "Concrete Pile Caps"
-                        
-                        # Check if predecessor is MCC, Switchgear, Transformer, or Substation
-                        is_mcc = pred_key == "MCC"
-                        is_switchgear = pred_key == "Switchgear"
-                        is_transformer = pred_key == "Transformer"
-                        is_substation = pred_key == "Substation"
-                        
-                        if pred_is_equipment:
-                            # Equipment predecessor - use existing rules
-                            pred_max_z = pred.get("MaxOfMaxZ", float('inf'))
-                            if not has_vertical_dependency(pred_max_z, current_min_z, 0, 0.2):
-                                continue
-                                
-                            # Check horizontal overlap - if coordinates are not available, this check fails
-                            if has_coordinates:
-                                has_coordinates_pred = all(col in pred for col in ["MinOfMinX", "MaxOfMaxX", "MinOfMinY", "MaxOfMaxY"])
-                                if has_coordinates_pred:
-                                    pred_box = (pred["MinOfMinX"], pred["MaxOfMaxX"], pred["MinOfMinY"], pred["MaxOfMaxY"])
-                                    if not has_80_percent_area_overlap(current_box, pred_box):
-                                        continue
-                                else:
-                                    # No coordinates for predecessor - horizontal check fails
-                                    continue
-                            else:
-                                # No coordinates for current activity - horizontal check fails
-                                continue
-                                
-                        elif is_structure_steel:
-                            # Structure Steel predecessor
-                            pred_min_z = pred.get("MinOfMinZ", float('-inf'))
-                            pred_max_z = pred.get("MaxOfMaxZ", float('inf'))
-                            
-                            # Check vertical dependency: Min Z of Equipment >= Min Z of Steel AND < Max Z of Steel
-                            if not (pred_min_z <= current_min_z < pred_max_z):
-                                continue
-                                
-                            # Check horizontal overlap - if coordinates are not available, this check fails
-                            if has_coordinates:
-                                has_coordinates_pred = all(col in pred for col in ["MinOfMinX", "MaxOfMaxX", "MinOfMinY", "MaxOfMaxY"])
-                                if has_coordinates_pred:
-                                    pred_box = (pred["MinOfMinX"], pred["MaxOfMaxX"], pred["MinOfMinY"], pred["MaxOfMaxY"])
-                                    if not has_80_percent_area_overlap(current_box, pred_box):
-                                        continue
-                                else:
-                                    # No coordinates for predecessor - horizontal check fails
-                                    continue
-                            else:
-                                # No coordinates for current activity - horizontal check fails
-                                continue
-                                        
-                        elif is_concrete or is_pile_cap:
-                            # Concrete or Pile Cap predecessor - use existing vertical and horizontal rules
-                            pred_max_z = pred.get("MaxOfMaxZ", float('inf'))
-                            if not has_vertical_dependency(pred_max_z, current_min_z, 0.5, 0.2):
-                                continue
-                                
-                            # Check horizontal overlap - if coordinates are not available, this check fails
-                            if has_coordinates:
-                                has_coordinates_pred = all(col in pred for col in ["MinOfMinX", "MaxOfMaxX", "MinOfMinY", "MaxOfMaxY"])
-                                if has_coordinates_pred:
-                                    pred_box = (pred["MinOfMinX"], pred["MaxOfMaxX"], pred["MinOfMinY"], pred["MaxOfMaxY"])
-                                    if not has_80_percent_area_overlap(current_box, pred_box):
-                                        continue
-                                else:
-                                    # No coordinates for predecessor - horizontal check fails
-                                    continue
-                            else:
-                                # No coordinates for current activity - horizontal check fails
-                                continue
-                        else:
-                            # Skip other types of predecessors
-                            continue
-                    else:
-                        # No pred_key found and not UG Conduit - skip this predecessor
-                        continue
+                    # Check if predecessor is Structure Steel
+                    is_structure_steel = pred_key == "Primary Steel"
                     
-                    # If we reach here, all conditions are met, add as predecessor
-                    activity_id = full_name_to_id.get(act["ScheduleActivityID"], "")
-                    predecessor_id = full_name_to_id.get(pred["ScheduleActivityID"], "")
+                    # Check if predecessor is Concrete
+                    is_concrete = pred_key == "Concrete"
                     
-                    # Check if this dependency already exists to avoid duplicates
-                    existing_dep = any(
-                        r["ScheduleActivityID"] == act["ScheduleActivityID"] and
-                        r["Predecessor"] == pred["ScheduleActivityID"]
-                        for r in results
-                    )
+                    # Check if predecessor is Pile Cap
+                    is_pile_cap = pred_key == "Pile Caps" or pred_key == "Concrete Pile Caps"
                     
-                    if not existing_dep:
-                        results.append({
-                            "ScheduleActivityID": act["ScheduleActivityID"],
-                            "ActivityScheduleTaskID": activity_id,
-                            "Predecessor": pred["ScheduleActivityID"],
-                            "PredecessorScheduleTaskID": predecessor_id,
-                            "Rel": "FS",
-                            "TaskType": "Construct",
-                            "Discipline": act["Discipline"],
-                        })
-            # Special module rule: If current activity is module, only follow special rules
-            elif is_module:
-                current_min_z = act.get("MinOfMinZ", 0)
-                # Create bounding box for current activity if coordinate columns exist
-                has_coordinates = all(col in act for col in ["MinOfMinX", "MaxOfMaxX", "MinOfMinY", "MaxOfMaxY"])
-                current_box = None
-                if has_coordinates:
-                    current_box = (act["MinOfMinX"], act["MaxOfMaxX"], act["MinOfMinY"], act["MaxOfMaxY"])
-                
-                # Check all other activities in the same group as potential predecessors
-                for _, pred in group.iterrows():
-                    # Skip if it's the same activity
-                    if pred["ScheduleActivityID"] == act["ScheduleActivityID"]:
-                        continue
-                        
-                    # Identify predecessor type using the same approach as default logic
-                    pred_key = next((k for k in dep_keys if contains_dependency(k, _simplify_for_rule_match(pred["ScheduleActivityID"]), allowed_phrases=dependencies.get(k, []))), None)
+                    # Check if predecessor is MCC, Switchgear, Transformer, or Substation
+                    is_mcc = pred_key == "MCC"
+                    is_switchgear = pred_key == "Switchgear"
+                    is_transformer = pred_key == "Transformer"
+                    is_substation = pred_key == "Substation"
                     
-                    # Apply rules based on predecessor type
-                    if pred_key:
-                        # Check if predecessor is Equipment (has TagNo)
-                        pred_is_equipment = pd.notna(pred.get("TagNo")) and pred.get("TagNo") != ""
-                        
-                        # Check if predecessor is Module (has ModuleNo)
-                        pred_is_module = pd.notna(pred.get("ModuleNo")) and pred.get("ModuleNo") != ""
-                        
-                        # Check if predecessor is Structure Steel
-                        is_structure_steel = pred_key == "Primary Steel"
-                        
-                        # Check if predecessor is Concrete
-                        is_concrete = pred_key == "Concrete"
-                        
-                        # Check if predecessor is Pile Cap
-                        is_pile_cap = pred_key == "Pile Caps" or pred_key == "Concrete Pile Caps"
-                        
-                        # Check if predecessor is MCC, Switchgear, Transformer, or Substation
-                        is_mcc = pred_key == "MCC"
-                        is_switchgear = pred_key == "Switchgear"
-                        is_transformer = pred_key == "Transformer"
-                        is_substation = pred_key == "Substation"
+                    if pred_is_equipment:
+                        # Equipment predecessor - use existing rules
+                        pred_max_z = max_z[j]
+                        if not has_vertical_dependency(pred_max_z, current_min_z, 0, 0.2):
+                            continue
+                            
+                        # Check horizontal overlap
+                        pred_box = (x_min[j], x_max[j], y_min[j], y_max[j])
+                        if not has_80_percent_area_overlap(current_box, pred_box):
+                            continue
+                            
+                    elif is_structure_steel:
+                        # Structure Steel predecessor
+                        pred_min_z = min_z[j]
+                        pred_max_z = max_z[j]
                         
-                        if pred_is_equipment or pred_is_module:
-                            # Equipment or Module predecessor - use existing rules
-                            pred_max_z = pred.get("MaxOfMaxZ", float('inf'))
-                            if not has_vertical_dependency(pred_max_z, current_min_z, 0, 0.2):
-                                continue
-                                
-                            # Check horizontal overlap - if coordinates are not available, this check fails
-                            if has_coordinates:
-                                has_coordinates_pred = all(col in pred for col in ["MinOfMinX", "MaxOfMaxX", "MinOfMinY", "MaxOfMaxY"])
-                                if has_coordinates_pred:
-                                    pred_box = (pred["MinOfMinX"], pred["MaxOfMaxX"], pred["MinOfMinY"], pred["MaxOfMaxY"])
-                                    if not has_80_percent_area_overlap(current_box, pred_box):
-                                        continue
-                                else:
-                                    # No coordinates for predecessor - horizontal check fails
-                                    continue
-                            else:
-                                # No coordinates for current activity - horizontal check fails
-                                continue
-                                
-                        elif is_structure_steel:
-                            # Structure Steel predecessor
-                            pred_min_z = pred.get("MinOfMinZ", float('-inf'))
-                            pred_max_z = pred.get("MaxOfMaxZ", float('inf'))
+                        # Check vertical dependency: Min Z of Equipment >= Min Z of Steel AND < Max Z of Steel
+                        if not (pred_min_z <= current_min_z < pred_max_z):
+                            continue
+                            
+                        # Check horizontal overlap
+                        pred_box = (x_min[j], x_max[j], y_min[j], y_max[j])
+                        if not has_80_percent_area_overlap(current_box, pred_box):
+                            continue
+                                    
+                    elif is_concrete or is_pile_cap:
+                        # Concrete or Pile Cap predecessor - use existing vertical and horizontal rules
+                        pred_max_z = max_z[j]
+                        if not has_vertical_dependency(pred_max_z, current_min_z, 0.5, 0.2):
+                            continue
                             
-                            # Check vertical dependency: Min Z of Module >= Min Z of Steel AND < Max Z of Steel
-                            if not (pred_min_z <= current_min_z < pred_max_z):
-                                continue
-                                
-                            # Check horizontal overlap - if coordinates are not available, this check fails
-                            if has_coordinates:
-                                has_coordinates_pred = all(col in pred for col in ["MinOfMinX", "MaxOfMaxX", "MinOfMinY", "MaxOfMaxY"])
-                                if has_coordinates_pred:
-                                    pred_box = (pred["MinOfMinX"], pred["MaxOfMaxX"], pred["MinOfMinY"], pred["MaxOfMaxY"])
-                                    if not has_80_percent_area_overlap(current_box, pred_box):
-                                        continue
-                                else:
-                                    # No coordinates for predecessor - horizontal check fails
-                                    continue
-                            else:
-                                # No coordinates for current activity - horizontal check fails
-                                continue
-                                        
-                        elif is_concrete or is_pile_cap:
-                            # Concrete or Pile Cap predecessor - use existing vertical and horizontal rules
-                            pred_max_z = pred.get("MaxOfMaxZ", float('inf'))
-                            if not has_vertical_dependency(pred_max_z, current_min_z, 0, 0.2):
-                                continue
-                                
-                            # Check horizontal overlap - if coordinates are not available, this check fails
-                            if has_coordinates:
-                                has_coordinates_pred = all(col in pred for col in ["MinOfMinX", "MaxOfMaxX", "MinOfMinY", "MaxOfMaxY"])
-                                if has_coordinates_pred:
-                                    pred_box = (pred["MinOfMinX"], pred["MaxOfMaxX"], pred["MinOfMinY"], pred["MaxOfMaxY"])
-                                    if not has_80_percent_area_overlap(current_box, pred_box):
-                                        continue
-                                else:
-                                    # No coordinates for predecessor - horizontal check fails
-                                    continue
-                            else:
-                                # No coordinates for current activity - horizontal check fails
-                                continue
-                        else:
-                            # Skip other types of predecessors
+                        # Check horizontal overlap
+                        pred_box = (x_min[j], x_max[j], y_min[j], y_max[j])
+                        if not has_80_percent_area_overlap(current_box, pred_box):
                             continue
                     else:
-                        # No pred_key found - skip this predecessor
+                        # Skip other types of predecessors
                         continue
+                else:
+                    # No pred_key found and not UG Conduit - skip this predecessor
+                    continue
+                
+                # If we reach here, all conditions are met, add as predecessor
+                # Skip dependencies that were already added
+                edge = (act.ScheduleActivityID, sids[j])
+                if edge in seen_edges:
+                    continue
+                seen_edges.add(edge)
+                edge_acts.append(act.ScheduleActivityID)
+                edge_preds.append(sids[j])
+                edge_disciplines.append(act.Discipline)
+        # Special module rule: If current activity is module, only follow special rules
+        elif is_module:
+            # Without coordinate columns the horizontal check fails for every predecessor
+            if not has_coordinates:
+                continue
+            current_min_z = min_z[i]
+            current_box = (x_min[i], x_max[i], y_min[i], y_max[i])
+            
+            # Check the other activities of the group that reach high enough to be predecessors
+            start = np.searchsorted(sorted_reach, current_min_z, side="right")
+            for j in sorted(reach_order[start:].tolist()):
+                # Skip if it's the same activity
+                if sids[j] == act.ScheduleActivityID:
+                    continue
+                    
+                # Predecessor type, identified once per group with the same approach as default logic
+                pred_key = pred_keys[j]
+                
+                # Apply rules based on predecessor type
+                if pred_key:
+                    # Check if predecessor is Equipment (has TagNo)
+                    pred_is_equipment = equipment_flags[j]
+                    
+                    # Check if predecessor is Module (has ModuleNo)
+                    pred_is_module = module_flags[j]
                     
-                    # If we reach here, all conditions are met, add as predecessor
-                    activity_id = full_name_to_id.get(act["ScheduleActivityID"], "")
-                    predecessor_id = full_name_to_id.get(pred["ScheduleActivityID"], "")
+                    # Check if predecessor is Structure Steel
+                    is_structure_steel = pred_key == "Primary Steel"
                     
-                    # Check if this dependency already exists to avoid duplicates
-                    existing_dep = any(
-                        r["ScheduleActivityID"] == act["ScheduleActivityID"] and
-                        r["Predecessor"] == pred["ScheduleActivityID"]
-                        for r in results
-                    )
+                    # Check if predecessor is Concrete
+                    is_concrete = pred_key == "Concrete"
                     
-                    if not existing_dep:
-                        results.append({
-                            "ScheduleActivityID": act["ScheduleActivityID"],
-                            "ActivityScheduleTaskID": activity_id,
-                            "Predecessor": pred["ScheduleActivityID"],
-                            "PredecessorScheduleTaskID": predecessor_id,
-                            "Rel": "FS",
-                            "TaskType": "Construct",
-                            "Discipline": act["Discipline"],
-                        })
-            else:
-                # Default dependency matching - EXACTLY as in original MEICodeRev9.py
-                dep_key = next((k for k in dep_keys if contains_dependency(k, _simplify_for_rule_match(act["ScheduleActivityID"]), allowed_phrases=dependencies.get(k, []))), None)
-                if dep_key:
-                    preds = dependencies.get(dep_key, [])
-                    matches = pd.DataFrame()
-                    for pname in preds:
-                        m = group[group['ScheduleActivityID'].apply(
-                            lambda x: contains_dependency(pname, x, allowed_phrases=preds)
-                        )]
-                        matches = pd.concat([matches, m])
+                    # Check if predecessor is Pile Cap
+                    is_pile_cap = pred_key == "Pile Caps" or pred_key == "Concrete Pile Caps"
                     
-                    matches.drop_duplicates(subset=['ScheduleActivityID'], inplace=True)
-                    matches = matches[matches['ScheduleActivityID'] != act["ScheduleActivityID"]]
+                    # Check if predecessor is MCC, Switchgear, Transformer, or Substation
+                    is_mcc = pred_key == "MCC"
+                    is_switchgear = pred_key == "Switchgear"
+                    is_transformer = pred_key == "Transformer"
+                    is_substation = pred_key == "Substation"
                     
-                    for _, pred in matches.iterrows():
-                        # Get ScheduleTaskID for activity and predecessor
-                        activity_id = full_name_to_id.get(act["ScheduleActivityID"], "")
-                        predecessor_id = full_name_to_id.get(pred["ScheduleActivityID"], "")
+                    if pred_is_equipment or pred_is_module:
+                        # Equipment or Module predecessor - use existing rules
+                        pred_max_z = max_z[j]
+                        if not has_vertical_dependency(pred_max_z, current_min_z, 0, 0.2):
+                            continue
+                            
+                        # Check horizontal overlap
+                        pred_box = (x_min[j], x_max[j], y_min[j], y_max[j])
+                        if not has_80_percent_area_overlap(current_box, pred_box):
+                            continue
+                            
+                    elif is_structure_steel:
+                        # Structure Steel predecessor
+                        pred_min_z = min_z[j]
+                        pred_max_z = max_z[j]
                         
-                        results.append({
-                            "ScheduleActivityID": act["ScheduleActivityID"],
-                            "ActivityScheduleTaskID": activity_id,
-                            "Predecessor": pred["ScheduleActivityID"],
-                            "PredecessorScheduleTaskID": predecessor_id,
-                            "Rel": "FS",
-                            "TaskType": "Construct",
-                            "Discipline": act["Discipline"],
-                        })
+                        # Check vertical dependency: Min Z of Module >= Min Z of Steel AND < Max Z of Steel
+                        if not (pred_min_z <= current_min_z < pred_max_z):
+                            continue
+                            
+                        # Check horizontal overlap
+                        pred_box = (x_min[j], x_max[j], y_min[j], y_max[j])
+                        if not has_80_percent_area_overlap(current_box, pred_box):
+                            continue
+                                    
+                    elif is_concrete or is_pile_cap:
+                        # Concrete or Pile Cap predecessor - use existing vertical and horizontal rules
+                        pred_max_z = max_z[j]
+                        if not has_vertical_dependency(pred_max_z, current_min_z, 0, 0.2):
+                            continue
+                            
+                        # Check horizontal overlap
+                        pred_box = (x_min[j], x_max[j], y_min[j], y_max[j])
+                        if not has_80_percent_area_overlap(current_box, pred_box):
+                            continue
+                    else:
+                        # Skip other types of predecessors
+                        continue
+                else:
+                    # No pred_key found - skip this predecessor
+                    continue
+                
+                # If we reach here, all conditions are met, add as predecessor
+                # Skip dependencies that were already added
+                edge = (act.ScheduleActivityID, sids[j])
+                if edge in seen_edges:
+                    continue
+                seen_edges.add(edge)
+                edge_acts.append(act.ScheduleActivityID)
+                edge_preds.append(sids[j])
+                edge_disciplines.append(act.Discipline)
+        else:
+            # Default dependency matching - EXACTLY as in original MEICodeRev9.py
+            dep_key = key_of(act.ScheduleActivityID)
+            if dep_key:
+                # Matches depend only on the rule, so they are found once per group
+                if dep_key not in standard_matches:
+                    standard_matches[dep_key] = _standard_predecessor_names(group, dependencies.get(dep_key, []))
+                
+                for pred_sid in standard_matches[dep_key]:
+                    if pred_sid == act.ScheduleActivityID:
+                        continue
+                    
+                    # Skip dependencies that were already added
+                    edge = (act.ScheduleActivityID, pred_sid)
+                    if edge in seen_edges:
+                        continue
+                    seen_edges.add(edge)
+                    edge_acts.append(act.ScheduleActivityID)
+                    edge_preds.append(pred_sid)
+                    edge_disciplines.append(act.Discipline)
+    return edge_acts, edge_preds, edge_disciplines
+
+
+def process_activities(df: pd.DataFrame, dependencies: dict, id_to_name: dict, name_to_id: dict, full_name_to_id: dict,
+                       max_workers: int = None) -> pd.DataFrame:
+    """
+    Find predecessors for each activity within its CWA/SubArea group.
+    
+    This function processes activities and applies dependency rules to find valid predecessors.
+    It handles three types of activities differently:
+    - Equipment: Uses special rules for concrete, steel, pile caps, etc.
+    - Module: Uses special rules similar to equipment
+    - Standard: Uses standard dependency matching rules
+    
+    Args:
+        df: DataFrame containing activities data
+        dependencies: Dictionary of dependency rules
+        id_to_name: Mapping from ID to name
+        name_to_id: Mapping from name to ID
+        full_name_to_id: Mapping from full name to ID
+        max_workers: Worker processes for the CWA/SubArea groups; None uses
+            all CPUs and 1 runs everything in this process
+        
+    Returns:
+        DataFrame with one row per dependency relationship found
+    """
+    df = df.copy()
+    df["ScheduleActivityID"] = df["ScheduleActivityID"].astype(str)
+    df["Rel"] = df.get("Rel", "FS")
+    df["TaskType"] = df.get("TaskType", "Construct")
+    df["Discipline"] = df.get("Discipline", "")
+    # Equipment/module flags are computed for all rows at once, not per group
+    df[EQUIPMENT_FLAG] = _flag_column(df, "TagNo")
+    df[MODULE_FLAG] = _flag_column(df, "ModuleNo")
+    # Repeated labels are stored once; grouping then works on the integer codes
+    for col in ("CWA", "SubArea", "Discipline"):
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+
+    df.sort_values(by=["CWA", "MinOfMinZ"], inplace=True)
+    group_cols = ["CWA"] + (["SubArea"] if "SubArea" in df.columns else [])
 
-    return results
+    dep_items = _freeze_dependencies(dependencies)
+    # The schema is the same for every group, so the coordinate check is done once
+    has_coordinates = all(col in df.columns for col in COORD_COLUMNS)
+    # One code per CWA/SubArea pair in sorted key order (-1 for missing keys);
+    # observed=True skips label combinations that have no activities
+    codes = df.groupby(group_cols, observed=True).ngroup().to_numpy()
+    # A stable sort by code makes each group a contiguous slice in its current row order
+    order = np.argsort(codes, kind="stable")
+    order = order[codes[order] >= 0]
+    df = df.iloc[order]
+    codes = codes[order]
+    bounds = np.flatnonzero(np.diff(codes, prepend=-1)).tolist() + [len(codes)]
+    groups = [df.iloc[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+    find_group_predecessors = partial(_process_group, dependencies=dependencies, dep_items=dep_items,
+                                      has_coordinates=has_coordinates)
+    
+    workers = max_workers if max_workers is not None else (os.cpu_count() or 1)
+    if workers > 1 and len(groups) > 1 and len(df) >= PARALLEL_MIN_ACTIVITIES:
+        # Groups are independent; spread them over worker processes in order-preserving chunks
+        chunksize = max(1, len(groups) // (workers * 4))
+        # Spawned, not forked: the parallel numba kernels may already have started
+        # their thread pool in this process, and forking with threads running can hang
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+            group_results = list(executor.map(find_group_predecessors, groups, chunksize=chunksize))
+    else:
+        group_results = map(find_group_predecessors, groups)
+    
+    # The same activity name can appear in several groups; keep its first edge to each predecessor
+    acts, preds, disciplines = [], [], []
+    seen_edges = set()
+    for group_acts, group_preds, group_disciplines in group_results:
+        for act_sid, pred_sid, discipline in zip(group_acts, group_preds, group_disciplines):
+            edge = (act_sid, pred_sid)
+            if edge in seen_edges:
+                continue
+            seen_edges.add(edge)
+            acts.append(act_sid)
+            preds.append(pred_sid)
+            disciplines.append(discipline)
+    
+    # Task IDs are looked up once per column; the object Series keeps integer IDs from becoming floats,
+    # and where() fills missing IDs without the dtype downcast that fillna() would attempt
+    task_ids = pd.Series(full_name_to_id, dtype=object)
+    acts = pd.Series(acts, dtype=object)
+    preds = pd.Series(preds, dtype=object)
+    return pd.DataFrame({
+        "ScheduleActivityID": acts,
+        "ActivityScheduleTaskID": acts.map(task_ids).astype(object).where(lambda s: s.notna(), ""),
+        "Predecessor": preds,
+        "PredecessorScheduleTaskID": preds.map(task_ids).astype(object).where(lambda s: s.notna(), ""),
+        "Rel": "FS",
+        "TaskType": "Construct",
+        "Discipline": pd.Series(disciplines, dtype=object),
+    })
 
 
 def generate_schedule_dependencies_csv(output_file: str = None) -> str:
@@ -396,48 +746,45 @@ def generate_schedule_dependencies_csv(output_file: str = None) -> str:
         
         # Process activities to find dependencies
         print("Processing activities and applying dependency rules...")
-        results = process_activities(activities_df, dependencies, id_to_name, name_to_id, full_name_to_id)
-        
-        # Create DataFrame from dependency results
-        pred_df = pd.DataFrame(results) if results else pd.DataFrame(columns=["ScheduleActivityID", "Predecessor", "Rel", "TaskType", "Discipline"])
-        if not pred_df.empty:
-            pred_df.drop_duplicates(inplace=True)
+        # Each (activity, predecessor) pair appears once, so no drop_duplicates pass is needed
+        pred_df = process_activities(activities_df, dependencies, id_to_name, name_to_id, full_name_to_id)
 
         # Ensure required columns before export - EXACTLY as in original MEICodeRev9.py
         for col, default in [("Rel", "FS"), ("TaskType", "Construct"), ("Discipline", "")]:
             if col not in activities_df.columns:
                 activities_df[col] = default
 
-        # Merge only on ScheduleActivityID to avoid KeyError - EXACTLY as in original
-        export_df = activities_df[["ScheduleActivityID", "Rel", "TaskType"]].copy()
-        export_df = export_df.merge(
-            pred_df[["ScheduleActivityID", "Predecessor"]],
-            on="ScheduleActivityID",
-            how="left"
-        )
-        export_df["Predecessor"] = export_df["Predecessor"].fillna("")
+        # Left join on ScheduleActivityID - same rows and order as the original merge.
+        # Each activity's predecessors are looked up as one list and exploded into
+        # one row per predecessor; the exploded index is the activity's position.
+        pred_lists = pred_df.groupby("ScheduleActivityID", sort=False)["Predecessor"].agg(list)
+        sids = activities_df["ScheduleActivityID"].to_numpy()
+        predecessors = pd.Series(sids, dtype=object).map(pred_lists).explode()
+        rows = predecessors.index.to_numpy()
+        sid_col = pd.Series(sids[rows], dtype=object)
+        pred_col = predecessors.fillna("").reset_index(drop=True)
 
         # Export without Discipline column - EXACTLY as in original
-        # First, let's add the new ID columns to export_df
-        export_df["ActivityScheduleTaskID"] = ""
-        export_df["PredecessorScheduleTaskID"] = ""
-        
-        # Fill in the ID values where we have matches
-        for idx, row in export_df.iterrows():
-            if row["ScheduleActivityID"] in full_name_to_id:
-                export_df.at[idx, "ActivityScheduleTaskID"] = full_name_to_id[row["ScheduleActivityID"]]
-            if row["Predecessor"] in full_name_to_id:
-                export_df.at[idx, "PredecessorScheduleTaskID"] = full_name_to_id[row["Predecessor"]]
+        # Fill in the ID columns where we have matches, empty otherwise.
+        # Mapping through an object Series keeps integer IDs from becoming floats,
+        # and where() fills the gaps without the downcast that fillna() would attempt.
+        task_ids = pd.Series(full_name_to_id, dtype=object)
+        # Columns are built once, in the exact order of the original export
+        export_df = pd.DataFrame({
+            "ScheduleActivityID": sid_col,
+            "ActivityScheduleTaskID": sid_col.map(task_ids).astype(object).where(lambda s: s.notna(), ""),
+            "Rel": activities_df["Rel"].to_numpy()[rows],
+            "TaskType": activities_df["TaskType"].to_numpy()[rows],
+            "Predecessor": pred_col,
+            "PredecessorScheduleTaskID": pred_col.map(task_ids).astype(object).where(lambda s: s.notna(), ""),
+        })
         
         # Generate output filename if not provided
         if output_file is None:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             output_file = f"schedule_dependencies_{timestamp}.csv"
         
-        # Export with exact same column order as original
-        export_df[["ScheduleActivityID", "ActivityScheduleTaskID", "Rel", "TaskType", "Predecessor", "PredecessorScheduleTaskID"]].to_csv(
-            output_file, index=False
-        )
+        _write_csv(export_df, output_file)
         print(f"Schedule dependencies CSV generated: {output_file}")
         print(f"Total dependency relationships found: {len(pred_df)}")
         
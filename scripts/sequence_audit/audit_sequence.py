@@ -1,17 +1,54 @@
+import io
 import json
 import os
-from typing import Any, Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, TextIO, Tuple
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    from numba import njit
+    _HAVE_NUMBA = True
+except ImportError:
+    _HAVE_NUMBA = False
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
 
 
 def _safe_float(v: Any) -> Optional[float]:
+    # JSON numbers are mostly floats already; only other values need converting
+    if type(v) is float:
+        return v
+    if v is None:
+        return None
+    return _try_float(v)
+
+
+def _try_float(v: Any) -> Optional[float]:
+    # ints go through here too: float() overflows on very large ones
     try:
-        if v is None:
-            return None
         return float(v)
     except Exception:
         return None
 
 
+_NAN_BOX = (np.nan,) * 4
+
+
 def _get_box(rec: Dict[str, Any]) -> Optional[Tuple[float, float, float, float]]:
     x1 = _safe_float(rec.get("MinOfMinX"))
     x2 = _safe_float(rec.get("MaxOfMaxX"))
@@ -22,200 +59,343 @@ def _get_box(rec: Dict[str, Any]) -> Optional[Tuple[float, float, float, float]]
     return (x1, x2, y1, y2)
 
 
-def _area_overlap_ratio(box1: Tuple[float, float, float, float], box2: Tuple[float, float, float, float]) -> float:
+def _record_geometry(rec: Dict[str, Any]) -> Tuple[float, float, float, float, float, float]:
+    # [minX, maxX, minY, maxY, minZ, maxZ]; missing values are NaN and a box
+    # with any missing side is NaN as a whole, so NaN fails every check
+    minz = _safe_float(rec.get("MinOfMinZ"))
+    maxz = _safe_float(rec.get("MaxOfMaxZ"))
+    return (_get_box(rec) or _NAN_BOX) + (np.nan if minz is None else minz, np.nan if maxz is None else maxz)
+
+
+# No on-disk cache: the dataProc service can load this file by path under another
+# module name, and a cache entry written that way fails to load on a normal import
+@njit(nogil=True)
+def _overlap_ratios_nb(boxes: np.ndarray, x1_min: float, x1_max: float, y1_min: float, y1_max: float) -> np.ndarray:
+    # Loop form of _area_overlap_ratio_batch; no fastmath, NaN rows must stay 0.0
+    out = np.zeros(boxes.shape[0])
+    a1 = max(0.0, (x1_max - x1_min) * (y1_max - y1_min))
+    if a1 <= 0:
+        return out
+    for i in range(boxes.shape[0]):
+        a2 = (boxes[i, 1] - boxes[i, 0]) * (boxes[i, 3] - boxes[i, 2])
+        if not a2 > 0:
+            continue
+        overlap_x = max(0.0, min(x1_max, boxes[i, 1]) - max(x1_min, boxes[i, 0]))
+        overlap_y = max(0.0, min(y1_max, boxes[i, 3]) - max(y1_min, boxes[i, 2]))
+        overlap_area = overlap_x * overlap_y
+        out[i] = max(overlap_area / a1, overlap_area / a2)
+    return out
+
+
+def _area_overlap_ratio_batch(box1: Tuple[float, float, float, float], boxes: np.ndarray) -> np.ndarray:
+    # boxes is (n, 4) [minX, maxX, minY, maxY]; rows with NaN coordinates get 0.0
+    if _HAVE_NUMBA:
+        return _overlap_ratios_nb(np.ascontiguousarray(boxes, dtype=np.float64), *box1)
     x1_min, x1_max, y1_min, y1_max = box1
-    x2_min, x2_max, y2_min, y2_max = box2
-    overlap_x = max(0.0, min(x1_max, x2_max) - max(x1_min, x2_min))
-    overlap_y = max(0.0, min(y1_max, y2_max) - max(y1_min, y2_min))
+    overlap_x = np.maximum(0.0, np.minimum(x1_max, boxes[:, 1]) - np.maximum(x1_min, boxes[:, 0]))
+    overlap_y = np.maximum(0.0, np.minimum(y1_max, boxes[:, 3]) - np.maximum(y1_min, boxes[:, 2]))
     overlap_area = overlap_x * overlap_y
     a1 = max(0.0, (x1_max - x1_min) * (y1_max - y1_min))
-    a2 = max(0.0, (x2_max - x2_min) * (y2_max - y2_min))
-    if a1 <= 0 or a2 <= 0:
-        return 0.0
-    r1 = overlap_area / a1
-    r2 = overlap_area / a2
-    return max(r1, r2)
+    a2 = np.maximum(0.0, (boxes[:, 1] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 2]))
+    if a1 <= 0:
+        return np.zeros(len(boxes))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.maximum(overlap_area / a1, overlap_area / a2)
+    return np.where(a2 > 0, ratio, 0.0)
 
 
-def _has_vertical_dependency(pred_max_z: Optional[float], curr_min_z: Optional[float], th1: float, th2: float) -> bool:
-    if pred_max_z is None or curr_min_z is None:
-        return False
-    return (curr_min_z > (pred_max_z - th1)) and (curr_min_z < (pred_max_z + th2))
+@lru_cache(maxsize=None)
+def _norm_text(s: str) -> str:
+    return s.strip().casefold()
 
 
 def _norm_type(s: Optional[str]) -> str:
-    return str(s or "").strip().casefold()
+    # Only the str form is cached, so unhashable JSON values still work
+    return _norm_text(str(s or ""))
+
+
+# Reports with fewer nodes without predecessors are audited on one thread
+_PARALLEL_MIN_NODES = 2000
+
+
+# Mirror the current service defaults
+_DEFAULT_RULES: Dict[str, List[Dict[str, Any]]] = {
+    "Equipment": [
+        {"type": "Concrete", "vert": (0.5, 0.2), "horiz": 0.8},
+        {"type": "Piling", "vert": (0.5, 0.2), "horiz": 0.8},
+        {"type": "Civil Works", "vert": (0.5, 0.2), "horiz": 0.8},
+    ],
+    "Grout": [{"type": "Concrete", "vert": (0.2, 0.2), "horiz": 0.8}],
+    "Piling": [],
+    "Concrete": [],
+    "Piping": [{"type": "Concrete", "vert": (0.5, 0.2), "horiz": 0.8}],
+    "Piping Insulation": [{"type": "Piping", "horiz": 0.8}],
+    "Cable Tray": [{"type": "Concrete", "vert": (0.5, 0.2), "horiz": 0.8}],
+    "Electrical": [
+        {"type": "Cable Tray", "horiz": 0.6},
+        {"type": "UG Conduit", "horiz": 0.6},
+    ],
+    "Instrumentation": [{"type": "Piping", "horiz": 0.6}],
+    "UG Conduit": [{"type": "Civil Works", "horiz": 0.6}],
+    "Transformer": [{"type": "Concrete", "vert": (0.5, 0.2), "horiz": 0.8}],
+    "Civil Works": [],
+}
 
 
 def _default_rules() -> Dict[str, List[Dict[str, Any]]]:
-    # Mirror the current service defaults
-    return {
-        "Equipment": [
-            {"type": "Concrete", "vert": (0.5, 0.2), "horiz": 0.8},
-            {"type": "Piling", "vert": (0.5, 0.2), "horiz": 0.8},
-            {"type": "Civil Works", "vert": (0.5, 0.2), "horiz": 0.8},
-        ],
-        "Grout": [{"type": "Concrete", "vert": (0.2, 0.2), "horiz": 0.8}],
-        "Piling": [],
-        "Concrete": [],
-        "Piping": [{"type": "Concrete", "vert": (0.5, 0.2), "horiz": 0.8}],
-        "Piping Insulation": [{"type": "Piping", "horiz": 0.8}],
-        "Cable Tray": [{"type": "Concrete", "vert": (0.5, 0.2), "horiz": 0.8}],
-        "Electrical": [
-            {"type": "Cable Tray", "horiz": 0.6},
-            {"type": "UG Conduit", "horiz": 0.6},
-        ],
-        "Instrumentation": [{"type": "Piping", "horiz": 0.6}],
-        "UG Conduit": [{"type": "Civil Works", "horiz": 0.6}],
-        "Transformer": [{"type": "Concrete", "vert": (0.5, 0.2), "horiz": 0.8}],
-        "Civil Works": [],
-    }
+    # Shared table; callers must not modify it
+    return _DEFAULT_RULES
 
 
-def _pair_defaults(cur_type: str, pred_type: str) -> Tuple[Optional[float], Optional[Tuple[float, float]]]:
-    rules = _default_rules()
-    cur_l = _norm_type(cur_type)
-    pred_l = _norm_type(pred_type)
-    for k, lst in rules.items():
-        if _norm_type(k) != cur_l:
-            continue
+def _build_pair_table() -> Dict[Tuple[str, str], Tuple[Optional[float], Optional[Tuple[float, float]]]]:
+    # (current type, predecessor type), normalized -> (horiz, vert); the first rule listed wins
+    table: Dict[Tuple[str, str], Tuple[Optional[float], Optional[Tuple[float, float]]]] = {}
+    for k, lst in _default_rules().items():
+        cur_l = _norm_type(k)
         for r in lst:
-            if _norm_type(r.get("type")) == pred_l:
-                return (r.get("horiz"), r.get("vert"))
-    return (None, None)
+            table.setdefault((cur_l, _norm_type(r.get("type"))), (r.get("horiz"), r.get("vert")))
+    return table
+
+
+_PAIR_TABLE = _build_pair_table()
+
+
+def _pair_defaults(cur_type: str, pred_type: str) -> Tuple[Optional[float], Optional[Tuple[float, float]]]:
+    return _PAIR_TABLE.get((_norm_type(cur_type), _norm_type(pred_type)), (None, None))
+
+
+def _verdict_text(ptype: str, n_cands: int, n_horiz: int, n_both: int,
+                  th_h: float, th_v: Optional[Tuple[float, float]]) -> str:
+    # First check that rules out every candidate of the type, or why none was selected
+    if not n_cands:
+        return f"- {ptype}: no candidates of this type in same CWA"
+    if not n_horiz:
+        return f"- {ptype}: {n_cands} candidates found, none pass horizontal >= {th_h}"
+    if th_v is None:
+        return f"- {ptype}: has candidates passing horizontal >= {th_h} (no vertical check required) but none selected → review selection logic"
+    if not n_both:
+        return f"- {ptype}: horizontal passed but vertical not within ({th_v[0]}, {th_v[1]})"
+    return f"- {ptype}: has candidates that pass both checks but none selected → review selection logic"
+
+
+def _allowed_types(rules: Any, rules_by_norm: Dict[str, Any], cur_type: str) -> List[str]:
+    allowed: List[str] = []
+    if isinstance(rules, dict):
+        # Exact key first, then case-insensitive match
+        raw = rules.get(cur_type) if cur_type in rules else rules_by_norm.get(_norm_type(cur_type))
+        if isinstance(raw, list):
+            seen = set()
+            for p in raw:
+                key = _norm_type(str(p))
+                if key not in seen:
+                    seen.add(key)
+                    allowed.append(str(p))
+    # If no provided, fall back to defaults list
+    if not allowed:
+        allowed = [r.get("type") for r in _default_rules().get(cur_type, [])]
+    return allowed
 
 
 def _load_json(path: str) -> Any:
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    with open(path, "rb") as f:
+        data = f.read()
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # orjson rejects NaN/Infinity literals that json accepts
+            pass
+    return json.loads(data)
+
+
+def _load_optional_json(path: str) -> Any:
+    try:
+        return _load_json(path)
+    except FileNotFoundError:
+        return None
 
 
-def audit(data_dir: str) -> str:
+def _duration_columns(records: Any) -> Tuple[np.ndarray, List[str], List[Any], List[Any]]:
+    # Keep only what the audit reads: geometry (see _record_geometry), CWA, Type and name per row
+    geom_rows: List[Tuple[float, ...]] = []
+    cwas: List[str] = []
+    types: List[Any] = []
+    names: List[Any] = []
+    for rec in records:
+        geom_rows.append(_record_geometry(rec))
+        cwas.append(str(rec.get("CWA") or "").strip())
+        types.append(rec.get("Type"))
+        names.append(rec.get("Element Name"))
+    return np.array(geom_rows, dtype=np.float64).reshape(-1, 6), cwas, types, names
+
+
+def _read_duration(path: str) -> Tuple[np.ndarray, List[str], List[Any], List[Any]]:
+    # Stream the records with ijson so the whole dict tree is never held at once
+    if ijson is not None:
+        try:
+            with open(path, "rb") as f:
+                return _duration_columns(ijson.items(f, "item", use_float=True))
+        except ijson.JSONError:
+            # e.g. NaN literals; parse the whole file instead
+            pass
+    return _duration_columns(_load_json(path))
+
+
+def audit(data_dir: str, sink: Optional[TextIO] = None) -> Optional[str]:
     # Inputs
     dur_path = os.path.join(data_dir, "duration_output_latest.json")
     seq_path = os.path.join(data_dir, "sequence_output_latest.json")
     rules_path = os.path.join(data_dir, "dependency_rules.json")
 
-    duration = _load_json(dur_path)
-    seq = _load_json(seq_path)
-    rules = _load_json(rules_path) if os.path.exists(rules_path) else None
+    # Read and parse the three files concurrently; errors surface in the old order
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        duration_future = pool.submit(_read_duration, dur_path)
+        seq_future = pool.submit(_load_json, seq_path)
+        rules_future = pool.submit(_load_optional_json, rules_path)
+        geom, cwa_of, type_of, name_of = duration_future.result()
+        seq = seq_future.result()
+        rules = rules_future.result()
 
     if isinstance(seq, dict):
         nodes = seq.get("result") or seq.get("activities") or []
     else:
         nodes = seq
 
-    # Index duration by CWA and name
-    by_cwa: Dict[str, List[Dict[str, Any]]] = {}
-    by_name: Dict[str, Dict[str, Any]] = {}
-    for rec in duration:
-        cwa = str(rec.get("CWA") or "").strip()
-        by_cwa.setdefault(cwa, []).append(rec)
-        name = rec.get("Element Name")
+    has_box = ~np.isnan(geom[:, :4]).any(axis=1)
+
+    # Integer codes for CWA and normalized Type, in first-seen order
+    cwa_code: Dict[str, int] = {}
+    type_code: Dict[str, int] = {}
+    by_name: Dict[str, int] = {}
+    cwa_codes = np.empty(len(cwa_of), dtype=np.int64)
+    type_codes = np.empty(len(cwa_of), dtype=np.int64)
+    for i, (cwa, rtype, name) in enumerate(zip(cwa_of, type_of, name_of)):
+        cwa_codes[i] = cwa_code.setdefault(cwa, len(cwa_code))
+        type_codes[i] = type_code.setdefault(_norm_type(rtype), len(type_code))
         if name:
-            by_name[name] = rec
+            by_name[name] = i
+    # Rows ordered by (CWA, type) code; the candidates of one pair are a slice of this order
+    n_types = max(len(type_code), 1)
+    pair_codes = cwa_codes * n_types + type_codes
+    pair_order = np.argsort(pair_codes, kind="stable")
+    sorted_pairs = pair_codes[pair_order]
+
+    # Case-insensitive view of the rules (first key wins), and the allowed types resolved per node type
+    rules_by_norm: Dict[str, Any] = {}
+    if isinstance(rules, dict):
+        for k, v in rules.items():
+            rules_by_norm.setdefault(_norm_type(k), v)
+    allowed_by_type: Dict[str, List[str]] = {}
 
     no_pred_nodes = [n for n in nodes if not n.get("Predecessors")]
 
-    lines: List[str] = []
-    lines.append(f"# Sequence Audit Log\n")
-    lines.append(f"Data directory: `{data_dir}`\n")
-    lines.append(f"Total activities: {len(nodes)}\n")
-    lines.append(f"Activities without predecessors: {len(no_pred_nodes)}\n")
-    lines.append("")
-
-    for n in no_pred_nodes:
+    # The report is written node by node; without a sink it is collected and returned
+    out = io.StringIO() if sink is None else sink
+    out.write("\n".join((
+        f"# Sequence Audit Log\n",
+        f"Data directory: `{data_dir}`\n",
+        f"Total activities: {len(nodes)}\n",
+        f"Activities without predecessors: {len(no_pred_nodes)}\n",
+        "",
+    )))
+
+    def audit_node(n: Dict[str, Any]) -> List[str]:
         name = n.get("ScheduleActivityID")
-        rec = by_name.get(name, {})
-        cwa = str(rec.get("CWA") or "").strip()
-        cur_type = str(rec.get("Type") or n.get("Type") or "").strip()
-        cur_box = _get_box(rec)
-        cur_minz = _safe_float(rec.get("MinOfMinZ"))
-        lines.append(f"## {name}\n")
-        lines.append(f"- Type: {cur_type}")
-        lines.append(f"- CWA: {cwa}")
-
-        # Determine allowed predecessor types
-        allowed: List[str] = []
-        if isinstance(rules, dict):
-            raw = None
-            if cur_type in rules:
-                raw = rules.get(cur_type)
-            else:
-                # case-insensitive match
-                for k, v in rules.items():
-                    if _norm_type(k) == _norm_type(cur_type):
-                        raw = v
-                        break
-            if isinstance(raw, list):
-                seen = set()
-                for p in raw:
-                    key = _norm_type(str(p))
-                    if key not in seen:
-                        seen.add(key)
-                        allowed.append(str(p))
-        # If no provided, fall back to defaults list
-        if not allowed:
-            allowed = [r.get("type") for r in _default_rules().get(cur_type, [])]
+        idx = by_name.get(name)
+        if idx is not None:
+            cwa = cwa_of[idx]
+            cur_type = str(type_of[idx] or n.get("Type") or "").strip()
+            cur_box = tuple(geom[idx, :4].tolist()) if has_box[idx] else None
+            cur_minz = geom[idx, 4]
+        else:
+            cwa = ""
+            cur_type = str(n.get("Type") or "").strip()
+            cur_box = None
+            cur_minz = np.nan
+        lines = [f"## {name}\n", f"- Type: {cur_type}", f"- CWA: {cwa}"]
+
+        # Determine allowed predecessor types (once per distinct type)
+        allowed = allowed_by_type.get(cur_type)
+        if allowed is None:
+            allowed = allowed_by_type[cur_type] = _allowed_types(rules, rules_by_norm, cur_type)
 
         if not allowed:
             lines.append("- No allowed predecessor types configured (skipping checks).\n")
-            continue
+        else:
+            cur_norm = _norm_type(cur_type)
+            cur_cwa_code = cwa_code.get(cwa, -1)
+            # (ptype, candidates, horizontal passes, both passes, th_h, th_v) per allowed type
+            checks = []
+            for ptype in allowed:
+                ptype_norm = _norm_type(ptype)
+                # thresholds
+                th_h, th_v = _PAIR_TABLE.get((cur_norm, ptype_norm), (None, None))
+                # Ignore vertical rule for Equipment for now
+                if cur_norm == "equipment":
+                    th_v = None
+                if th_h is None:
+                    th_h = 0.8
+
+                # candidates in same CWA and type
+                ptype_code = type_code.get(ptype_norm, -1)
+                cand_idx = pair_order[:0]
+                if cur_cwa_code >= 0 and ptype_code >= 0:
+                    pair = cur_cwa_code * n_types + ptype_code
+                    lo, hi = np.searchsorted(sorted_pairs, (pair, pair + 1))
+                    cand_idx = pair_order[lo:hi]
+
+                # Horizontal filter, all candidates at once
+                horiz_idx = cand_idx[:0]
+                if cur_box and len(cand_idx):
+                    passed = has_box[cand_idx] & (_area_overlap_ratio_batch(cur_box, geom[cand_idx, :4]) >= float(th_h))
+                    horiz_idx = cand_idx[passed]
+
+                # Vertical check (if any); NaN Z values fail both comparisons
+                n_both = 0
+                if th_v is not None and len(horiz_idx):
+                    pred_max = geom[horiz_idx, 5]
+                    n_both = int(np.count_nonzero((cur_minz > (pred_max - th_v[0])) & (cur_minz < (pred_max + th_v[1]))))
+                checks.append((ptype, len(cand_idx), len(horiz_idx), n_both, th_h, th_v))
+
+            lines.extend([_verdict_text(*check) for check in checks])
+            lines.append("")
+        return lines
+
+    def audit_nodes(chunk: List[Dict[str, Any]]) -> List[List[str]]:
+        return [audit_node(n) for n in chunk]
+
+    # Nodes only read the shared indexes, so chunks of them can run on threads;
+    # chunks are contiguous and mapped in order, so the report order is kept
+    workers = os.cpu_count() or 1
+    if workers > 1 and len(no_pred_nodes) >= _PARALLEL_MIN_NODES:
+        size = -(-len(no_pred_nodes) // (workers * 4))
+        chunks = [no_pred_nodes[i:i + size] for i in range(0, len(no_pred_nodes), size)]
+        executor = ThreadPoolExecutor(max_workers=workers)
+        node_lines = (lines for chunk_lines in executor.map(audit_nodes, chunks) for lines in chunk_lines)
+    else:
+        executor = None
+        node_lines = map(audit_node, no_pred_nodes)
+
+    try:
+        for lines in node_lines:
+            # Same text as joining every line of the report with "\n"
+            out.write("\n")
+            out.write("\n".join(lines))
+    finally:
+        if executor is not None:
+            executor.shutdown()
 
-        for ptype in allowed:
-            # thresholds
-            th_h, th_v = _pair_defaults(cur_type, ptype)
-            # Ignore vertical rule for Equipment for now
-            if _norm_type(cur_type) == "equipment":
-                th_v = None
-            if th_h is None:
-                th_h = 0.8
-
-            # candidates in same CWA and type
-            cands = [r for r in by_cwa.get(cwa, []) if _norm_type(r.get("Type")) == _norm_type(ptype)]
-            if not cands:
-                lines.append(f"- {ptype}: no candidates of this type in same CWA")
-                continue
-
-            # Horizontal filter
-            horiz_pass = []
-            for cand in cands:
-                b2 = _get_box(cand)
-                if not cur_box or not b2:
-                    continue
-                if _area_overlap_ratio(cur_box, b2) >= float(th_h):
-                    horiz_pass.append(cand)
-            if not horiz_pass:
-                lines.append(f"- {ptype}: {len(cands)} candidates found, none pass horizontal >= {th_h}")
-                continue
-
-            # Vertical check (if any)
-            if th_v is not None:
-                vpass = []
-                for cand in horiz_pass:
-                    pred_max = _safe_float(cand.get("MaxOfMaxZ"))
-                    if _has_vertical_dependency(pred_max, cur_minz, th_v[0], th_v[1]):
-                        vpass.append(cand)
-                if not vpass:
-                    lines.append(f"- {ptype}: horizontal passed but vertical not within ({th_v[0]}, {th_v[1]})")
-                    continue
-                else:
-                    lines.append(f"- {ptype}: has candidates that pass both checks but none selected → review selection logic")
-            else:
-                lines.append(f"- {ptype}: has candidates passing horizontal >= {th_h} (no vertical check required) but none selected → review selection logic")
-
-        lines.append("")
-
-    return "\n".join(lines)
+    if sink is None:
+        return out.getvalue()
+    return None
 
 
 def main():
     # Default to docker-setup/pyproc-data which is the mounted data folder in this repo
     data_dir = os.environ.get("SEQ_AUDIT_DATA", os.path.join("docker-setup", "pyproc-data"))
-    report = audit(data_dir)
     out_path = os.path.join(data_dir, "log.md")
-    with open(out_path, "w", encoding="utf-8") as f:
-        f.write(report)
+    with open(out_path, "w", buffering=1 << 20, encoding="utf-8") as f:
+        audit(data_dir, f)
     print(f"Wrote audit log to {out_path}")
 
 
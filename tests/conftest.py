@@ -0,0 +1,50 @@
+import importlib
+import os
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+OLD_DIR = os.path.join(ROOT_DIR, "old")
+
+# The legacy modules import each other as top-level modules, and the audit
+# script is imported as scripts.sequence_audit like the dataProc service does
+for path in (ROOT_DIR, OLD_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+@pytest.fixture
+def fresh_import(monkeypatch, request):
+    """
+    Import a module again, optionally as if some optional packages were missing.
+    
+    Returns a function (name, reload=(), blocked=()) that drops name and the
+    modules in reload from sys.modules, makes the modules in blocked raise
+    ImportError, and imports name. sys.modules is restored after the test.
+    """
+    def load(name: str, reload: tuple = (), blocked: tuple = ()):
+        for mod in blocked:
+            monkeypatch.setitem(sys.modules, mod, None)
+        for mod in reload + (name,):
+            if mod in sys.modules:
+                monkeypatch.delitem(sys.modules, mod)
+            else:
+                request.addfinalizer(lambda mod=mod: sys.modules.pop(mod, None))
+        return importlib.import_module(name)
+    return load
+
+
+@pytest.fixture
+def mei_module():
+    """
+    The meicoderev9_refactored module; skips the test if it cannot be imported.
+    
+    db_utils imports pyodbc, which also fails to import when the ODBC driver
+    manager (libodbc) is not installed.
+    """
+    try:
+        import meicoderev9_refactored
+    except ImportError as e:
+        pytest.skip(f"meicoderev9_refactored cannot be imported: {e}")
+    return meicoderev9_refactored
@@ -0,0 +1,87 @@
+"""
+NaN handling of the 80% area overlap check.
+
+has_80_percent_area_overlap has always used min()/max(), which skip a NaN
+in the second box (the predecessor) and keep one in the first (the current
+activity). Predecessors with a missing side therefore keep passing the
+check against the sides of the current box.
+"""
+
+import math
+
+import pandas as pd
+import pytest
+
+import mei_rules
+
+NAN = math.nan
+BOX = (0.0, 10.0, 0.0, 10.0)
+
+
+def _baseline_overlap(box1, box2):
+    # The original implementation, kept as the reference
+    x_min1, x_max1, y_min1, y_max1 = box1
+    x_min2, x_max2, y_min2, y_max2 = box2
+    overlap_x = max(0, min(x_max1, x_max2) - max(x_min1, x_min2))
+    overlap_y = max(0, min(y_max1, y_max2) - max(y_min1, y_min2))
+    overlap_area = overlap_x * overlap_y
+    area1 = (x_max1 - x_min1) * (y_max1 - y_min1)
+    area2 = (x_max2 - x_min2) * (y_max2 - y_min2)
+    percent1 = overlap_area / area1 if area1 > 0 else 0
+    percent2 = overlap_area / area2 if area2 > 0 else 0
+    return percent1 >= 0.8 or percent2 >= 0.8
+
+
+@pytest.mark.parametrize("box1, box2, expected", [
+    (BOX, (NAN, 10.0, 0.0, 10.0), True),
+    (BOX, (NAN, NAN, NAN, NAN), True),
+    (BOX, (5.0, NAN, 0.0, 10.0), False),
+    ((NAN, 10.0, 0.0, 10.0), BOX, False),
+    ((0.0, 10.0, 0.0, NAN), BOX, False),
+    (BOX, (2.0, 12.0, 0.0, 10.0), True),
+    (BOX, (2.1, 12.1, 0.0, 10.0), False),
+    ((0.0, 0.0, 0.0, 10.0), BOX, False),
+])
+def test_nan_sides(box1, box2, expected):
+    assert _baseline_overlap(box1, box2) is expected
+    assert mei_rules.has_80_percent_area_overlap(box1, box2) is expected
+
+
+def test_matches_baseline_on_grid():
+    values = [NAN, -1.0, 0.0, 0.5, 2.0, 8.0, 10.0]
+    for x_min in values:
+        for x_max in values:
+            for y_max in values:
+                pred = (x_min, x_max, 0.0, y_max)
+                for box1, box2 in ((BOX, pred), (pred, BOX)):
+                    assert mei_rules.has_80_percent_area_overlap(box1, box2) == _baseline_overlap(box1, box2), (box1, box2)
+
+
+@pytest.mark.parametrize("path", ["kernel", "masks", "rows"])
+def test_process_activities_keeps_nan_predecessor(mei_module, monkeypatch, path):
+    m = mei_module
+    if path == "masks":
+        monkeypatch.setattr(m, "HAVE_NUMBA", False)
+    elif path == "rows":
+        monkeypatch.setattr(m, "VECTORIZE_MIN_GROUP", 10 ** 6)
+    
+    rows = [{
+        "ScheduleActivityID": "A1 - Equipment Setting", "TagNo": "P-101",
+        "MinOfMinX": 0.0, "MaxOfMaxX": 10.0, "MinOfMinY": 0.0, "MaxOfMaxY": 10.0,
+        "MinOfMinZ": 1.0, "MaxOfMaxZ": 2.0,
+    }, {
+        "ScheduleActivityID": "A2 - Concrete Pile Caps", "TagNo": None,
+        "MinOfMinX": NAN, "MaxOfMaxX": 10.0, "MinOfMinY": 0.0, "MaxOfMaxY": 10.0,
+        "MinOfMinZ": 0.0, "MaxOfMaxZ": 1.0,
+    }]
+    # Unrelated activities so the group is large enough for the vectorized paths
+    rows += [{
+        "ScheduleActivityID": f"A{k} - Insulation", "TagNo": None,
+        "MinOfMinX": 50.0, "MaxOfMaxX": 60.0, "MinOfMinY": 50.0, "MaxOfMaxY": 60.0,
+        "MinOfMinZ": 0.0, "MaxOfMaxZ": 1.0,
+    } for k in range(3, 12)]
+    df = pd.DataFrame(rows).assign(CWA="C1", SubArea="N", Discipline="Mechanical")
+    
+    result = m.process_activities(df, {"Concrete Pile Caps": []}, {}, {}, {}, max_workers=1)
+    assert list(zip(result["ScheduleActivityID"], result["Predecessor"])) == [
+        ("A1 - Equipment Setting", "A2 - Concrete Pile Caps")]
@@ -0,0 +1,42 @@
+"""
+Loading the audit script by file path, as the dataProc service falls back to.
+
+Both ways of loading must keep working in later processes, whichever ran first.
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+AUDIT_INPUT = os.path.join(ROOT_DIR, "tests", "data", "audit", "input")
+
+BY_PATH = """
+import importlib.util
+import sys
+
+spec = importlib.util.spec_from_file_location("_audit_sequence_fallback", "scripts/sequence_audit/audit_sequence.py")
+mod = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(mod)
+mod.audit(sys.argv[1])
+"""
+
+BY_PACKAGE = """
+import sys
+
+from scripts.sequence_audit.audit_sequence import audit
+
+audit(sys.argv[1])
+"""
+
+
+def test_audit_by_path_then_by_package(tmp_path):
+    pytest.importorskip("numba")
+    # Any compiled-function cache goes to a directory of its own
+    env = dict(os.environ, NUMBA_CACHE_DIR=str(tmp_path))
+    for script in (BY_PATH, BY_PACKAGE, BY_PATH):
+        result = subprocess.run([sys.executable, "-c", script, AUDIT_INPUT], cwd=ROOT_DIR, env=env,
+                                capture_output=True, text=True, timeout=300)
+        assert result.returncode == 0, result.stderr
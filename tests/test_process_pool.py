@@ -0,0 +1,47 @@
+"""
+Worker pool of process_activities.
+
+Runs in a fresh interpreter: the serial call starts the numba thread pool,
+and a forked pool started after it could hang the process.
+"""
+
+import os
+import subprocess
+import sys
+
+OLD_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "old")
+
+SCRIPT = """
+import pandas as pd
+import meicoderev9_refactored as m
+
+rows = []
+for g in range(60):
+    for k in range(40):
+        equipment = k % 4 == 0
+        rows.append({
+            "ScheduleActivityID": f"G{g} {k:02d} - " + ("Equipment Setting" if equipment else "Concrete"),
+            "CWA": f"C{g}",
+            "SubArea": "N",
+            "Discipline": "Civil",
+            "TagNo": f"P-{g}-{k}" if equipment else None,
+            "ModuleNo": None,
+            "MinOfMinX": 0.0, "MaxOfMaxX": 10.0 + k % 3, "MinOfMinY": 0.0, "MaxOfMaxY": 10.0,
+            "MinOfMinZ": float(k % 5), "MaxOfMaxZ": float(k % 5) + 1.0,
+        })
+df = pd.DataFrame(rows)
+assert len(df) >= m.PARALLEL_MIN_ACTIVITIES
+deps = {"Equipment Setting": ["Concrete"], "Concrete": []}
+
+serial = m.process_activities(df, deps, {}, {}, {}, max_workers=1)
+pooled = m.process_activities(df, deps, {}, {}, {}, max_workers=2)
+assert len(serial) > 0
+pd.testing.assert_frame_equal(serial, pooled)
+"""
+
+
+def test_pooled_call_after_serial_call(mei_module):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [OLD_DIR, env.get("PYTHONPATH")]))
+    result = subprocess.run([sys.executable, "-c", SCRIPT], env=env, capture_output=True, text=True, timeout=300)
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,108 @@
+"""
+End-to-end regression checks against outputs of the original implementation.
+
+The expected files in tests/data were written by the code before the
+performance work (process_activities, generate_schedule_dependencies_csv
+and audit_sequence.audit) on the inputs next to them. Each check runs with
+the optional accelerators that are installed, and again with all of them
+blocked.
+"""
+
+import json
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+SCHEDULE_DIR = os.path.join(DATA_DIR, "schedule")
+AUDIT_DIR = os.path.join(DATA_DIR, "audit")
+
+SCHEDULE_ACCELERATORS = ("numba", "ahocorasick", "pyarrow", "mei_rules_fast")
+AUDIT_ACCELERATORS = ("numba", "orjson", "ijson")
+
+
+def _load_activities() -> tuple:
+    activities = pd.read_csv(os.path.join(SCHEDULE_DIR, "activities.csv"), dtype={"TagNo": object, "ModuleNo": object})
+    return activities, _load_rules()["task_ids"]
+
+
+def _load_rules() -> dict:
+    with open(os.path.join(SCHEDULE_DIR, "rules.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.fixture(params=["installed", "blocked"])
+def mei(request, fresh_import, mei_module):
+    if request.param == "installed":
+        return mei_module
+    module = fresh_import("meicoderev9_refactored", reload=("mei_rules", "mei_kernels"), blocked=SCHEDULE_ACCELERATORS)
+    assert not module.HAVE_NUMBA and module.pa is None
+    return module
+
+
+@pytest.mark.filterwarnings("error::FutureWarning")
+def test_process_activities(mei):
+    activities, task_ids = _load_activities()
+    result = mei.process_activities(activities, _load_rules()["dependencies"], {}, {}, task_ids)
+    # Integer task IDs and the empty fill share one object column
+    assert result["ActivityScheduleTaskID"].dtype == object
+    assert result["PredecessorScheduleTaskID"].dtype == object
+    expected = pd.read_csv(os.path.join(SCHEDULE_DIR, "expected_dependencies.csv"), dtype=str, keep_default_na=False)
+    got = result[list(expected.columns)].astype(str)
+    assert got.values.tolist() == expected.values.tolist()
+
+
+@pytest.mark.filterwarnings("error::FutureWarning")
+def test_generate_schedule_dependencies_csv(mei, monkeypatch, tmp_path):
+    rules = _load_rules()
+    monkeypatch.setattr(mei, "load_dependency_rules", lambda: (rules["dependencies"], {}, {}))
+    monkeypatch.setattr(mei, "load_activities_data", _load_activities)
+    output_file = str(tmp_path / "schedule_dependencies.csv")
+    assert mei.generate_schedule_dependencies_csv(output_file) == output_file
+    with open(os.path.join(SCHEDULE_DIR, "expected_schedule.csv"), encoding="utf-8") as f:
+        expected = f.read()
+    with open(output_file, encoding="utf-8") as f:
+        assert f.read() == expected
+
+
+@pytest.fixture(params=["installed", "blocked"])
+def audit_module(request, fresh_import):
+    if request.param == "installed":
+        from scripts.sequence_audit import audit_sequence
+        return audit_sequence
+    module = fresh_import("scripts.sequence_audit.audit_sequence", blocked=AUDIT_ACCELERATORS)
+    assert module.orjson is None and module.ijson is None and not module._HAVE_NUMBA
+    return module
+
+
+def _audit_dir(tmp_path, rules: str) -> None:
+    # The report names its data directory, so the expected files use "audit"
+    shutil.copytree(os.path.join(AUDIT_DIR, "input"), tmp_path / "audit")
+    if rules == "custom":
+        shutil.copy(os.path.join(AUDIT_DIR, "dependency_rules.json"), tmp_path / "audit")
+
+
+def _expected_report(rules: str) -> str:
+    with open(os.path.join(AUDIT_DIR, f"expected_{rules}.md"), encoding="utf-8") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("threaded", [False, True])
+@pytest.mark.parametrize("rules", ["default", "custom"])
+def test_audit(audit_module, monkeypatch, tmp_path, rules, threaded):
+    if threaded:
+        monkeypatch.setattr(audit_module, "_PARALLEL_MIN_NODES", 1)
+    _audit_dir(tmp_path, rules)
+    monkeypatch.chdir(tmp_path)
+    assert audit_module.audit("audit") == _expected_report(rules)
+
+
+def test_audit_main_writes_log(audit_module, monkeypatch, tmp_path):
+    _audit_dir(tmp_path, "custom")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("SEQ_AUDIT_DATA", "audit")
+    audit_module.main()
+    with open(tmp_path / "audit" / "log.md", encoding="utf-8") as f:
+        assert f.read() == _expected_report("custom")
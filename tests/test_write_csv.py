@@ -0,0 +1,35 @@
+"""
+_write_csv must produce the same bytes as DataFrame.to_csv.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def _export_frame(names):
+    n = len(names)
+    return pd.DataFrame({
+        "ScheduleActivityID": names,
+        "ActivityScheduleTaskID": pd.Series([5001, "", 5003, 2.5, None, ""][:n], dtype=object),
+        "Rel": "FS",
+        "TaskType": "Construct",
+        "Predecessor": ["", "C1N 002 - Concrete", np.nan, "", "Pile Caps", " padded "][:n],
+        "PredecessorScheduleTaskID": [np.nan, 1.5, 7.0, np.nan, 3.0, 4.0][:n],
+    })
+
+
+@pytest.mark.parametrize("names", [
+    ["C1N 001 - Equipment Setting", "", "Shared 0 - Concrete", "é - Piping", "x", "y"],
+    ['Needs "quotes"', "comma, here", "line\nbreak", "a", "b", "c"],
+])
+@pytest.mark.parametrize("use_pyarrow", [True, False])
+def test_write_csv_matches_to_csv(mei_module, tmp_path, monkeypatch, names, use_pyarrow):
+    if not use_pyarrow:
+        monkeypatch.setattr(mei_module, "pa", None)
+    df = _export_frame(names)
+    expected = tmp_path / "expected.csv"
+    written = tmp_path / "written.csv"
+    df.to_csv(expected, index=False)
+    mei_module._write_csv(df, str(written))
+    assert written.read_bytes() == expected.read_bytes()